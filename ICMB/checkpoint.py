@@ -0,0 +1,131 @@
+# Resumable crawls.
+#
+# With JOB_ID set, the Checkpoint extension writes what the spider still has
+# to do to CHECKPOINT_DIR/<job id>/<spider>.json.gz every CHECKPOINT_INTERVAL
+# seconds and when the crawl stops early (Ctrl-C, CLOSESPIDER_* limits). A
+# later run with the same job id hands it back to the spider before its
+# start requests are read, so it only re-requests the outstanding work:
+#
+#     scrapy crawl wiki_movie_full -a source=urls.txt -s JOB_ID=weekly
+#     python -m ICMB.run --job nightly
+#
+# Spiders opt in with two methods:
+#
+#     checkpoint_state()        -> JSON-serializable dict
+#     restore_checkpoint(state)
+#
+# The state describes outstanding work (films still going through the
+# Wikipedia fallback queries, OTTplay pages and lookups not parsed yet, wiki
+# inputs not fetched yet) rather than pickled requests, so a checkpoint taken
+# while requests are in flight is as good as one taken at rest, and a crash
+# costs at most CHECKPOINT_INTERVAL seconds of work. Spiders drop work from
+# their state only after yielding its output, so resuming may repeat a few
+# items but never loses one. A crawl that finishes removes its checkpoint.
+
+import gzip
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+logger = logging.getLogger(__name__)
+
+# Sent before every checkpoint, so components holding scraped items
+# (StoragePipeline) can write them out before the work is dropped
+checkpoint_saving = object()
+
+FORMAT_VERSION = 1
+
+
+class Checkpoint:
+    def __init__(self, crawler, path, interval=60):
+        self.crawler = crawler
+        self.path = Path(path)
+        self.interval = interval
+        self.job_id = crawler.settings.get("JOB_ID")
+        self.task = None
+        self.spider = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        job_id = settings.get("JOB_ID")
+        if not job_id:
+            raise NotConfigured
+
+        path = Path(settings.get("CHECKPOINT_DIR", ".icmb/jobs")) / job_id / f"{crawler.spidercls.name}.json.gz"
+        ext = cls(crawler, path, interval=settings.getfloat("CHECKPOINT_INTERVAL", 60))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        if not hasattr(spider, "checkpoint_state"):
+            logger.warning("%s does not support checkpoints; JOB_ID ignored", spider.name)
+            return
+        self.spider = spider
+
+        data = self.load()
+        if data is not None:
+            spider.restore_checkpoint(data["state"])
+            self.crawler.stats.set_value("checkpoint/restored_from", data["saved_at"])
+            logger.info("Resuming job %s from the checkpoint of %s", self.job_id,
+                        time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["saved_at"])))
+
+        if self.interval > 0:
+            self.task = task.LoopingCall(self.save)
+            self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.spider is None:
+            return
+        if self.task is not None and self.task.running:
+            self.task.stop()
+
+        if reason == "finished":
+            # Nothing left to resume
+            self.path.unlink(missing_ok=True)
+            return
+        self.save()
+        logger.info("Job %s stopped (%s); rerun with JOB_ID=%s to resume", self.job_id, reason, self.job_id)
+
+    def load(self):
+        if not self.path.exists():
+            return None
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.error("Unreadable checkpoint %s, starting over: %r", self.path, e)
+            return None
+
+        if data.get("version") != FORMAT_VERSION:
+            logger.warning("Checkpoint %s has an unknown format, starting over", self.path)
+            return None
+        return data
+
+    def save(self):
+        self.crawler.signals.send_catch_log(checkpoint_saving, spider=self.spider)
+
+        data = {
+            "version": FORMAT_VERSION,
+            "job": self.job_id,
+            "spider": self.spider.name,
+            "saved_at": time.time(),
+            "state": self.spider.checkpoint_state(),
+        }
+
+        # Written aside and renamed, so a crash mid-write keeps the last one
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+            json.dump(data, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+        self.crawler.stats.inc_value("checkpoint/saved")
+        self.crawler.stats.set_value("checkpoint/bytes", self.path.stat().st_size)
@@ -0,0 +1,183 @@
+# Secondary lookups for the MovieItem columns an infobox does not carry:
+# trailer (YouTube search), OTT platform and link, soundtrack link and CBFC
+# rating (DuckDuckGo searches, see ICMB.search).
+#
+# Enricher.enrich() starts every enabled lookup for a film at once and
+# merges what comes back into the item. Each source has its own semaphore
+# (ENRICH_CONCURRENCY) so one slow source cannot take every slot, and the
+# per-host download slots still pace the requests themselves. The fan-out
+# is bounded by ENRICH_DEADLINE: lookups still running then are cancelled
+# and the film goes out with the columns that did arrive.
+#
+# Requests go through crawler.engine with the downloader middlewares
+# applied (response cache, throttling) but not the spider middlewares, so
+# the callbacks see every status code.
+
+import asyncio
+import re
+import urllib.parse
+
+import scrapy
+from scrapy.utils.defer import maybe_deferred_to_future
+
+from ICMB import search
+
+YOUTUBE_SEARCH_URL = "https://www.youtube.com/results"
+
+# First video of the search results in ytInitialData
+VIDEO_ID_RE = re.compile(r'"videoRenderer":\{"videoId":"([\w-]{11})"')
+
+MUSIC_DOMAINS = [
+    "open.spotify.com",
+    "music.apple.com",
+    "jiosaavn.com",
+    "gaana.com",
+    "music.youtube.com",
+    "wynk.in",
+]
+
+# "... certified U/A 13+ by the CBFC", "CBFC rating: A", "Certificate: UA".
+# The rating has to follow the keyword with nothing but spaces, quotes or
+# brackets between them, so a capital "A" starting the next sentence or a
+# word a few words on is never read as one.
+RATING_RE = re.compile(
+    r"(?:\b[Cc]ertified\b|\b[Cc]ertificate\b\s*:?|\b[Rr]ating\s*:)[\s'\"‘’“”(\[]*"
+    r"(U/A ?\d{1,2}\+|UA ?\d{1,2}\+|U/A|UA|U|A|S)(?![\w/+])"
+)
+
+SOURCES = ("trailer", "ott", "soundtrack", "censorship")
+
+
+class Enricher:
+    def __init__(self, crawler, sources=SOURCES, concurrency=None, deadline=30, timeout=12):
+        self.crawler = crawler
+        self.sources = [s for s in sources if s in SOURCES]
+        self.deadline = deadline
+        self.timeout = timeout
+        concurrency = concurrency or {}
+        self.slots = {s: asyncio.Semaphore(int(concurrency.get(s, 2))) for s in self.sources}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        sources = settings.getlist("ENRICH_SOURCES", list(SOURCES))
+        return cls(
+            crawler,
+            sources=sources,
+            concurrency=settings.getdict("ENRICH_CONCURRENCY"),
+            deadline=settings.getfloat("ENRICH_DEADLINE", 30),
+            timeout=settings.getfloat("ENRICH_TIMEOUT", 12),
+        )
+
+    # -------------------- FAN-OUT --------------------
+    async def enrich(self, item, language=""):
+        if not self.sources or not item.movie_name:
+            return item
+
+        tasks = {
+            asyncio.ensure_future(self.run(source, item, language)): source
+            for source in self.sources
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+
+        for task in pending:
+            task.cancel()
+            self.crawler.stats.inc_value(f"enrich/{tasks[task]}/deadline")
+        if pending:
+            await asyncio.wait(pending)
+
+        for task in done:
+            if task.exception() is None and task.result():
+                self.merge(item, task.result())
+        return item
+
+    async def run(self, source, item, language):
+        async with self.slots[source]:
+            try:
+                found = await getattr(self, f"lookup_{source}")(item, language)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.crawler.spider.logger.warning("%s lookup failed for %s: %r", source, item.movie_name, e)
+                self.crawler.stats.inc_value(f"enrich/{source}/error")
+                return None
+
+        self.crawler.stats.inc_value(f"enrich/{source}/{'found' if found else 'missing'}")
+        return found
+
+    def merge(self, item, found):
+        # Only fill what the infobox left empty
+        for field, value in found.items():
+            if value and not getattr(item, field):
+                setattr(item, field, value)
+
+    async def fetch(self, url, headers=None):
+        request = scrapy.Request(
+            url,
+            headers=headers,
+            dont_filter=True,
+            # Cancelled at the deadline, so never the request others wait on
+            meta={"download_timeout": self.timeout, "dont_coalesce": True}
+        )
+        engine = self.crawler.engine
+        # Scrapy >= 2.14; engine.download() serves older versions
+        if hasattr(engine, "download_async"):
+            response = await engine.download_async(request)
+        else:
+            response = await maybe_deferred_to_future(engine.download(request))
+        return response if response.status == 200 else None
+
+    def query(self, item, *terms):
+        # "Sirai (2025)" -> "Sirai 2025 ..."
+        name = item.movie_name.replace("(", "").replace(")", "")
+        return " ".join([name, *terms])
+
+    # -------------------- SOURCES --------------------
+    async def lookup_trailer(self, item, language):
+        url = YOUTUBE_SEARCH_URL + "?" + urllib.parse.urlencode(
+            {"search_query": self.query(item, language, "official trailer")}
+        )
+        response = await self.fetch(url, search.SEARCH_HEADERS)
+        m = VIDEO_ID_RE.search(response.text) if response is not None else None
+        if m is None:
+            return None
+        return {"trailer_youtube_link": f"https://www.youtube.com/watch?v={m.group(1)}"}
+
+    async def lookup_ott(self, item, language):
+        response = await self.fetch(search.search_url(self.query(item, language, "movie OTT streaming")),
+                                    search.SEARCH_HEADERS)
+        if response is None:
+            return None
+
+        url = search.pick_link(search.result_links(response.text), search.OTT_PRIORITY)
+        if url is None:
+            return None
+
+        platform = next(name for domain, name in search.OTT_PLATFORMS.items() if domain in url)
+        return {"ott_platform": platform, "tax_ott_platforms": platform, "ott_platform_link": url}
+
+    async def lookup_soundtrack(self, item, language):
+        response = await self.fetch(search.search_url(self.query(item, language, "songs soundtrack album")),
+                                    search.SEARCH_HEADERS)
+        if response is None:
+            return None
+
+        url = search.pick_link(search.result_links(response.text), MUSIC_DOMAINS)
+        return {"soundtrack": url} if url else None
+
+    async def lookup_censorship(self, item, language):
+        response = await self.fetch(search.search_url(self.query(item, "CBFC certificate")), search.SEARCH_HEADERS)
+        if response is None:
+            return None
+
+        for _, snippet in search.parse_results(response.text):
+            rating = censorship_rating(snippet)
+            if rating:
+                return {"censorship_rating": rating}
+        return None
+
+
+def censorship_rating(text):
+    # CBFC rating stated in a search snippet, "" when there is none
+    m = RATING_RE.search(text or "")
+    return m.group(1) if m else ""
@@ -0,0 +1,247 @@
+# Cross-source film index: links the PVR (movie_name, language), OTTplay
+# (title, ottplay_id) and Wikipedia (Movie_name with year) records of a film
+# to one canonical film id.
+#
+# An incoming record is matched, in order, by
+#   - a source reference seen before (OTTplay id, Wikipedia article),
+#   - its normalized name ("K.G.F: Chapter 2" / "KGF CHAPTER 2 (KANNADA)"),
+#   - character trigram similarity of the names (Dice coefficient at least
+#     ENTITY_MATCH_THRESHOLD), for spelling variants,
+# with language and year breaking ties between candidates. A known year
+# that differs from a candidate's rules it out (remakes reuse names), and
+# so do differing numbers in a fuzzy match (sequels).
+#
+# Trigram lookups read only what can reach the threshold: posting lists are
+# kept per gram and per gram count, and a film within the threshold has a
+# gram count within [t/(2-t), (2-t)/t] times the query's and shares one of
+# the query's rarest grams (prefix filtering), so only those lists are read
+# however common "the" or "an" get. The candidates are then verified against
+# their gram sets. Films live in memory and in the
+# "entities" table of ICMB_STATE_DB. One index is shared by every crawler of
+# the process (see ICMB.run), so films are linked across spiders within a run.
+
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from ICMB import normalize
+from ICMB.store import TTLStore
+
+# Dropped from the end of PVR names: "BORDER 2 HINDI 3D"
+TRAILING_TOKENS = {"2d", "3d", "4dx", "imax"} | {lang.casefold() for lang in normalize.PVR_LANGUAGES}
+LEADING_TOKENS = {"the"}
+
+QUIET_CHARS_RE = re.compile(r"['’.]")
+NON_WORD_RE = re.compile(r"[\W_]+")
+NUMBER_RE = re.compile(r"\d+")
+
+FLUSH_EVERY = 500
+
+
+def name_key(name):
+    # "The Raja Saab (2026 film)" -> "rajasaab"; "" when nothing is left
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = QUIET_CHARS_RE.sub("", normalize.PARENS_RE.sub(" ", text)).replace("&", " and ")
+    words = NON_WORD_RE.sub(" ", text).split()
+
+    while len(words) > 1 and words[-1] in TRAILING_TOKENS:
+        words.pop()
+    if len(words) > 1 and words[0] in LEADING_TOKENS:
+        words.pop(0)
+    return "".join(words)
+
+
+def name_year(name):
+    # Year given in the name itself: "Sirai (2025)", "Sirai (2025 film)"
+    for part in normalize.PARENS_RE.findall(name or ""):
+        m = normalize.YEAR_RE.search(part)
+        if m:
+            return m.group(0)
+    return ""
+
+
+def trigrams(key):
+    padded = f"^{key}$"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def clean_language(language):
+    language = (language or "").casefold().strip()
+    return "" if language == "unknown" else language
+
+
+class EntityIndex:
+    # film_id -> {"id", "name", "year", "languages", "keys", "refs"}
+    shared = {}
+
+    def __init__(self, store, threshold=0.8):
+        self.store = store
+        self.threshold = threshold
+        self.films = {}
+        self.by_key = {}
+        self.by_ref = {}
+        # trigram -> gram count of the film's name -> film ids
+        self.grams = {}
+        self.film_grams = {}
+        self.dirty = set()
+        self.users = 0
+
+        for _, film in store.items():
+            self.index(film)
+
+    @classmethod
+    def open(cls, settings):
+        # The process-wide index for this state database
+        path = settings.get("ICMB_STATE_DB", ".icmb/state.sqlite")
+        index = cls.shared.get(path)
+        if index is None:
+            index = cls.shared[path] = cls(
+                TTLStore(path, "entities"),
+                threshold=settings.getfloat("ENTITY_MATCH_THRESHOLD", 0.8),
+            )
+        index.users += 1
+        return index
+
+    def release(self):
+        self.flush()
+        self.users -= 1
+        if self.users <= 0:
+            self.shared.pop(self.store.path, None)
+            self.store.close()
+
+    def __len__(self):
+        return len(self.films)
+
+    # -------------------- LOOKUP --------------------
+    def match(self, name, language="", year="", refs=()):
+        # (film_id, how) with how one of "ref", "exact", "fuzzy"; (None, None)
+        # when no film matches
+        for ref in refs:
+            film_id = self.by_ref.get(ref)
+            if film_id is not None:
+                return film_id, "ref"
+
+        key = name_key(name)
+        if not key:
+            return None, None
+        language = clean_language(language)
+        year = year or name_year(name)
+
+        exact = self.by_key.get(key)
+        if exact:
+            film_id = self.best([(film_id, 1.0) for film_id in exact], language, year)
+            if film_id is not None:
+                return film_id, "exact"
+
+        film_id = self.best(self.similar(key), language, year)
+        if film_id is not None:
+            return film_id, "fuzzy"
+        return None, None
+
+    def similar(self, key):
+        query = trigrams(key)
+        t = self.threshold
+        numbers = NUMBER_RE.findall(key)
+        found = []
+
+        # Dice >= t between |q| and |c| grams needs an overlap of at least
+        # t*(|q|+|c|)/2 grams, so a film with |c| grams shares (at least two
+        # of) the query's |q|-overlap+2 rarest grams among films of that size
+        for size in range(math.ceil(len(query) * t / (2 - t)), math.floor(len(query) * (2 - t) / t) + 1):
+            overlap = math.ceil(t * (len(query) + size) / 2)
+            need = min(2, overlap)
+            postings = [self.grams.get(gram, {}).get(size, ()) for gram in query]
+            postings.sort(key=len)
+            hits = Counter()
+            for films in postings[:len(query) - overlap + need]:
+                hits.update(films)
+            candidates = [film_id for film_id, count in hits.items() if count >= need]
+
+            for film_id in candidates:
+                score = 2 * len(query & self.film_grams[film_id]) / (len(query) + size)
+                if score >= t and NUMBER_RE.findall(self.films[film_id]["keys"][0]) == numbers:
+                    found.append((film_id, score))
+        return found
+
+    def best(self, scored, language, year):
+        best_id, best_rank = None, None
+        for film_id, score in scored:
+            film = self.films[film_id]
+            if year and film["year"] and film["year"] != year:
+                continue
+            rank = (
+                score + 0.1 * (language in film["languages"]) + 0.1 * bool(year and film["year"] == year),
+                film["year"],
+            )
+            if best_rank is None or rank > best_rank:
+                best_id, best_rank = film_id, rank
+        return best_id
+
+    # -------------------- UPDATE --------------------
+    def add(self, name, language="", year="", refs=()):
+        # Film id for the record, creating the film when nothing matches;
+        # returns (film_id, how) with how "new" for a created film
+        film_id, how = self.match(name, language, year, refs)
+        year = year or name_year(name)
+        language = clean_language(language)
+        key = name_key(name)
+
+        if film_id is None:
+            if not key:
+                return None, None
+            film_id = self.new_id(key, year)
+            self.index({"id": film_id, "name": name, "year": year, "languages": [], "keys": [key], "refs": []})
+            self.dirty.add(film_id)
+            how = "new"
+
+        film = self.films[film_id]
+        changed = False
+        if year and not film["year"]:
+            film["year"] = year
+            changed = True
+        if language and language not in film["languages"]:
+            film["languages"].append(language)
+            changed = True
+        if key and key not in film["keys"]:
+            # Later lookups of this spelling resolve exactly
+            film["keys"].append(key)
+            self.by_key.setdefault(key, []).append(film_id)
+            changed = True
+        for ref in refs:
+            if ref not in self.by_ref:
+                film["refs"].append(ref)
+                self.by_ref[ref] = film_id
+                changed = True
+
+        if changed:
+            self.dirty.add(film_id)
+            if len(self.dirty) >= FLUSH_EVERY:
+                self.flush()
+        return film_id, how
+
+    def new_id(self, key, year):
+        seed = f"{key}|{year}"
+        while True:
+            film_id = "f" + hashlib.blake2b(seed.encode(), digest_size=5).hexdigest()
+            if film_id not in self.films:
+                return film_id
+            seed += "+"
+
+    def index(self, film):
+        film_id = film["id"]
+        self.films[film_id] = film
+        grams = self.film_grams[film_id] = trigrams(film["keys"][0])
+        for gram in grams:
+            self.grams.setdefault(gram, {}).setdefault(len(grams), []).append(film_id)
+        for key in film["keys"]:
+            self.by_key.setdefault(key, []).append(film_id)
+        for ref in film["refs"]:
+            self.by_ref[ref] = film_id
+
+    def flush(self):
+        if self.dirty:
+            self.store.set_many((film_id, self.films[film_id]) for film_id in self.dirty)
+            self.dirty = set()
@@ -0,0 +1,117 @@
+# Disk response cache used by ICMB.middlewares.IcmbDownloaderMiddleware.
+#
+# Entries are addressed by a hash of method + URL + body, so POST requests
+# with different payloads (PVR cities) get their own entries. Bodies are
+# plain files fanned out by key prefix; status, headers, size and access
+# times live in a small SQLite index used for freshness checks and
+# least-recently-used eviction once the cache exceeds its byte budget.
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+
+def request_key(request):
+    digest = hashlib.sha1()
+    digest.update(request.method.encode("ascii"))
+    digest.update(b"\n")
+    digest.update(request.url.encode("utf-8"))
+    digest.update(b"\n")
+    digest.update(request.body or b"")
+    return digest.hexdigest()
+
+
+class DiskResponseCache:
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.conn = sqlite3.connect(self.directory / "index.sqlite", isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL"
+            ")"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def body_path(self, key):
+        return self.directory / key[:2] / key
+
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT url, status, headers, stored_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        try:
+            body = self.body_path(key).read_bytes()
+        except FileNotFoundError:
+            self.delete(key)
+            return None
+
+        self.conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        url, status, headers, stored_at = row
+        return {
+            "url": url,
+            "status": status,
+            "headers": json.loads(headers),
+            "body": body,
+            "stored_at": stored_at,
+        }
+
+    def put(self, key, url, status, headers, body):
+        path = self.body_path(key)
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(body)
+
+        now = time.time()
+        previous = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries (key, url, status, headers, size, stored_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, url, status, json.dumps(headers), len(body), now, now)
+        )
+        self.total_bytes += len(body) - (previous[0] if previous else 0)
+        self.evict()
+
+    def touch(self, key):
+        now = time.time()
+        self.conn.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def delete(self, key):
+        row = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+
+        self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self.body_path(key).unlink(missing_ok=True)
+        self.total_bytes -= row[0]
+
+    def evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        rows = self.conn.execute("SELECT key FROM entries ORDER BY accessed_at").fetchall()
+        for (key,) in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.delete(key)
+            evicted += 1
+        return evicted
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,63 @@
+# lxml based helpers for reading Wikipedia film articles.
+#
+# The text helpers mirror BeautifulSoup's get_text(): comments and the
+# contents of <script>, <style> and <template> are skipped, which matters
+# because infobox cells embed TemplateStyles <style> blocks.
+
+from lxml import html
+
+SKIPPED_TAGS = frozenset(["script", "style", "template"])
+
+
+def has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+INFOBOX_ROWS = f"//table[{has_class('infobox')}]//tr"
+INFOBOX_IMAGE = f"//table[{has_class('infobox')}]//a[{has_class('image')}]//img"
+LEAD_PARAGRAPHS = f"//div[{has_class('mw-parser-output')}]/p"
+FIRST_HEADING = "//*[@id='firstHeading']"
+
+
+def parse_html(text):
+    return html.document_fromstring(text)
+
+
+def _strings(el):
+    if el.text:
+        yield el.text
+
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in SKIPPED_TAGS:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_text(el, separator="", strip=False):
+    if strip:
+        return separator.join(s.strip() for s in _strings(el) if s.strip())
+    return separator.join(_strings(el))
+
+
+def first(doc, xpath):
+    found = doc.xpath(xpath)
+    return found[0] if found else None
+
+
+class Infobox:
+    # Walks the infobox rows once and keeps (lower-cased header, cell) pairs
+    # in document order, so every label lookup is a scan of short strings.
+    def __init__(self, doc):
+        self.rows = []
+        for tr in doc.xpath(INFOBOX_ROWS):
+            th = tr.find(".//th")
+            if th is not None:
+                self.rows.append((get_text(th, strip=True).lower(), tr.find(".//td")))
+
+    def cell(self, label):
+        label = label.lower()
+        for header, td in self.rows:
+            if label in header:
+                return td
+        return None
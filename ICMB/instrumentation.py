@@ -0,0 +1,185 @@
+# Crawl instrumentation: histograms kept in Scrapy stats, plus an
+# extension that reports them.
+#
+# Histograms are plain dicts stored under "instrument/<metric>/<label>" so
+# they travel with the normal stats dump:
+#
+#     {"count": 12, "sum": 3.4, "buckets": {"0.1": 2, "0.25": 7, ..., "+Inf": 0}}
+#
+# Bucket counts are per bucket (not cumulative); prometheus_text() does the
+# cumulative sums when exporting. IcmbSpiderMiddleware feeds the download
+# latency, response size and callback CPU histograms; the Instrumentation
+# extension samples items/sec and writes the reports.
+
+import json
+import os
+import time
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+PREFIX = "instrument/"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CPU_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+SIZE_BUCKETS = (1024, 8192, 32768, 131072, 524288, 2097152, 8388608)
+RATE_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+# metric -> (Prometheus name, label name)
+METRICS = {
+    "download_latency": ("icmb_download_latency_seconds", "host"),
+    "response_bytes": ("icmb_response_bytes", "host"),
+    "callback_cpu": ("icmb_callback_cpu_seconds", "callback"),
+    "items_per_sec": ("icmb_items_per_second", "spider"),
+}
+
+
+def observe(stats, metric, label, value, buckets):
+    key = f"{PREFIX}{metric}/{label}"
+    hist = stats.get_value(key)
+    if hist is None:
+        hist = {"count": 0, "sum": 0.0, "buckets": {str(b): 0 for b in buckets}}
+        hist["buckets"]["+Inf"] = 0
+        stats.set_value(key, hist)
+
+    hist["count"] += 1
+    hist["sum"] += value
+    for bound in buckets:
+        if value <= bound:
+            hist["buckets"][str(bound)] += 1
+            break
+    else:
+        hist["buckets"]["+Inf"] += 1
+
+
+def histograms(stats):
+    found = {}
+    for key, hist in stats.get_stats().items():
+        if key.startswith(PREFIX):
+            metric, _, label = key[len(PREFIX):].partition("/")
+            found.setdefault(metric, {})[label] = hist
+    return found
+
+
+def prometheus_text(stats):
+    lines = []
+    for metric, by_label in sorted(histograms(stats).items()):
+        name, label_name = METRICS.get(metric, (f"icmb_{metric}", "label"))
+        lines.append(f"# TYPE {name} histogram")
+        for label, hist in sorted(by_label.items()):
+            label = label.replace("\\", "\\\\").replace('"', '\\"')
+            running = 0
+            for bound, count in hist["buckets"].items():
+                running += count
+                lines.append(f'{name}_bucket{{{label_name}="{label}",le="{bound}"}} {running}')
+            lines.append(f'{name}_sum{{{label_name}="{label}"}} {hist["sum"]}')
+            lines.append(f'{name}_count{{{label_name}="{label}"}} {hist["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_atomic(path, text):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class Instrumentation:
+    # Samples items/sec every INSTRUMENTATION_INTERVAL seconds, optionally
+    # rewrites INSTRUMENTATION_PROMETHEUS_FILE on the same tick, and dumps
+    # every histogram plus a per-host / per-callback summary to
+    # INSTRUMENTATION_REPORT when the spider closes.
+
+    def __init__(self, crawler, report_path, prometheus_path=None, interval=10):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.report_path = report_path
+        self.prometheus_path = prometheus_path
+        self.interval = interval
+        self.sample_task = None
+        self.last_items = 0
+        self.last_sample = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("INSTRUMENTATION_ENABLED"):
+            raise NotConfigured
+
+        ext = cls(
+            crawler,
+            settings.get("INSTRUMENTATION_REPORT", ".icmb/reports/{spider}.json"),
+            prometheus_path=settings.get("INSTRUMENTATION_PROMETHEUS_FILE"),
+            interval=settings.getfloat("INSTRUMENTATION_INTERVAL", 10),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.last_sample = time.monotonic()
+        if self.interval > 0:
+            self.sample_task = task.LoopingCall(self.tick, spider)
+            self.sample_task.start(self.interval, now=False)
+
+    def tick(self, spider):
+        self.sample(spider)
+        if self.prometheus_path:
+            write_atomic(self.prometheus_path.format(spider=spider.name), prometheus_text(self.stats))
+
+    def sample(self, spider):
+        now = time.monotonic()
+        elapsed = now - self.last_sample
+        if elapsed <= 0:
+            return
+
+        items = self.stats.get_value("item_scraped_count", 0)
+        observe(self.stats, "items_per_sec", spider.name, (items - self.last_items) / elapsed, RATE_BUCKETS)
+        self.last_items = items
+        self.last_sample = now
+
+    def spider_closed(self, spider, reason):
+        if self.sample_task is not None and self.sample_task.running:
+            self.sample_task.stop()
+
+        # A final partial interval would skew the rate, so only sample it
+        # when nothing was sampled yet (short runs)
+        if self.stats.get_value(f"{PREFIX}items_per_sec/{spider.name}") is None:
+            self.sample(spider)
+
+        if self.prometheus_path:
+            write_atomic(self.prometheus_path.format(spider=spider.name), prometheus_text(self.stats))
+
+        if self.report_path:
+            write_atomic(
+                self.report_path.format(spider=spider.name),
+                json.dumps(self.report(spider, reason), indent=2, default=str)
+            )
+
+    def report(self, spider, reason):
+        found = histograms(self.stats)
+
+        def means(metric):
+            return {
+                label: {"count": hist["count"], "total": round(hist["sum"], 4),
+                        "mean": round(hist["sum"] / hist["count"], 4) if hist["count"] else None}
+                for label, hist in sorted(found.get(metric, {}).items())
+            }
+
+        return {
+            "spider": spider.name,
+            "finish_reason": reason,
+            "elapsed_seconds": self.stats.get_value("elapsed_time_seconds"),
+            "requests": self.stats.get_value("downloader/request_count", 0),
+            "responses": self.stats.get_value("downloader/response_count", 0),
+            "items": self.stats.get_value("item_scraped_count", 0),
+            "summary": {
+                "download_latency": means("download_latency"),
+                "response_bytes": means("response_bytes"),
+                "callback_cpu": means("callback_cpu"),
+            },
+            "histograms": found,
+        }
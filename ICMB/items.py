@@ -2,11 +2,98 @@
 #
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
+#
+# Items are slotted dataclasses: no per-item __dict__, so large batches held
+# by the pipelines stay compact. Fields whose published column name is not a
+# valid identifier (e.g. "Release Date", " Genres") carry it in their
+# "column" metadata; export_fields() turns that into the FEED_EXPORT_FIELDS
+# mapping so feeds keep the existing column names and order. Columns added
+# since go after the published ones, never between them, so CSV consumers
+# reading by position keep working.
+
+from dataclasses import dataclass, field, fields, is_dataclass
+
+
+def column(name, default=""):
+    return field(default=default, metadata={"column": name})
+
+
+def export_fields(item_cls):
+    return {f.name: f.metadata.get("column", f.name) for f in fields(item_cls)}
+
+
+def export_dict(item):
+    if not is_dataclass(item):
+        return dict(item)
+    return {f.metadata.get("column", f.name): getattr(item, f.name) for f in fields(item)}
+
+
+def from_export(item_cls, data):
+    names = {f.metadata.get("column", f.name): f.name for f in fields(item_cls)}
+    names.update({f.name: f.name for f in fields(item_cls)})
+    return item_cls(**{names[k]: v for k, v in data.items() if k in names})
+
+
+@dataclass(slots=True)
+class NowShowingItem:
+    movie_name: str
+    language: str
+    wikipedia: str = "Not Found"
+    cities: list = field(default_factory=list)
+    change_status: str = ""
+    film_id: str = ""
+
 
-import scrapy
+@dataclass(slots=True)
+class OttReleaseItem:
+    title: str
+    language: str
+    ott_platform: str
+    ott_release_date: str
+    ott_link: str = None
+    ott_html: str = None
+    ottplay_id: str = ""
+    change_status: str = ""
+    film_id: str = ""
 
 
-class IcmbItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+@dataclass(slots=True)
+class MovieItem:
+    genres: str = column("Genres")
+    director: str = column("Director")
+    writer: str = column("Writer")
+    producer: str = column("Producer")
+    screenplay: str = column("Screenplay")
+    starring: str = column("Starring")
+    cinematography: str = column("Cinematography")
+    edited_by: str = column("Edited by")
+    music_by: str = column("Music by")
+    production_company: str = column("Production Company")
+    release_date: str = column("Release Date")
+    runtime: str = column("Runtime")
+    budget: str = column("Budget")
+    box_office: str = column("Box Office")
+    ott_platform: str = column("OTT Platform")
+    censorship_rating: str = column("Censorship Rating")
+    trailer_youtube_link: str = column("Trailer YouTube Link")
+    plot: str = column("Plot")
+    soundtrack: str = column("Soundtrack")
+    ott_platform_link: str = column("OTT Platfrom Link")
+    movie_name: str = column("Movie_name")
+    other_languages: str = column("Other Languages")
+    original_language: str = column("Original Language")
+    actors: str = column("Actors")
+    # Leading-space columns are the WordPress taxonomy fields
+    tax_directors: str = column(" Directors")
+    tax_languages: str = column(" Languages")
+    tax_genres: str = column(" Genres")
+    tax_years: str = column(" Years")
+    tax_ott_platforms: str = column(" OTT Platforms")
+    tax_musics: str = column(" Musics")
+    tax_running_in_cinemas: str = column(" Running in Cinemas")
+    tax_upcoming_movies: str = column(" Upcoming Movies")
+    poster: str = ""
+    years: str = column("Years")
+    wikipedia: str = ""
+    change_status: str = ""
+    film_id: str = ""
@@ -3,101 +3,555 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.httpobj import urlparse_cached
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from ICMB.httpcache import DiskResponseCache, request_key
+from ICMB.instrumentation import CPU_BUCKETS, LATENCY_BUCKETS, SIZE_BUCKETS, observe
+
+
+class _Relay:
+    # Hands a value yielded by a coroutine that is being stepped by hand up
+    # to whatever drives the current task, and brings back what it sends
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return (yield self.value)
+
+
+async def timed_await(coro):
+    # Awaits coro, returning (result, reactor thread CPU seconds spent inside
+    # it). The coroutine is stepped by hand, so the clock only runs while its
+    # own code does, not while it is suspended and other tasks get the loop.
+    spent = 0.0
+    step, value = coro.send, None
+    while True:
+        started = time.thread_time()
+        try:
+            yielded = step(value)
+        except StopIteration as e:
+            return e.value, spent + time.thread_time() - started
+        except BaseException as e:
+            e.cpu_spent = spent + time.thread_time() - started
+            raise
+        spent += time.thread_time() - started
+        try:
+            step, value = coro.send, await _Relay(yielded)
+        except BaseException as e:
+            step, value = coro.throw, e
+
 
 class IcmbSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
+    # Feeds the ICMB.instrumentation histograms: per-host download latency
+    # and response size on the way in, per-callback CPU time on the way out.
+    # The spiders' callbacks are generators that do their work while being
+    # iterated, so CPU time is the reactor thread's time spent inside next().
+    # (Timing from process_spider_input instead would also count whatever
+    # else the reactor ran in between.) Async callbacks are timed only while
+    # they run: a callback awaiting a download or a worker process gives the
+    # loop to other tasks, whose time is not its own (see timed_await).
+
+    def __init__(self, stats):
+        self.stats = stats
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        if not crawler.settings.getbool("INSTRUMENTATION_ENABLED"):
+            raise NotConfigured
+        s = cls(crawler.stats)
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
     def process_spider_input(self, response, spider):
-        # Called for each response that goes through the spider
-        # middleware and into the spider.
-
-        # Should return None or raise an exception.
+        host = urlparse_cached(response).hostname or ""
+        latency = response.meta.get("download_latency")
+        if latency is not None and "cached" not in response.flags:
+            observe(self.stats, "download_latency", host, latency, LATENCY_BUCKETS)
+        observe(self.stats, "response_bytes", host, len(response.body), SIZE_BUCKETS)
         return None
 
     def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
+        spent = 0.0
+        it = iter(result)
+        while True:
+            started = time.thread_time()
+            try:
+                out = next(it)
+            except StopIteration:
+                spent += time.thread_time() - started
+                break
+            spent += time.thread_time() - started
+            yield out
+        self.record_callback(response, spent)
 
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
+    async def process_spider_output_async(self, response, result, spider):
+        spent = 0.0
+        it = result.__aiter__()
+        while True:
+            try:
+                out, cpu = await timed_await(it.__anext__())
+            except StopAsyncIteration as e:
+                spent += e.cpu_spent
+                break
+            spent += cpu
+            yield out
+        self.record_callback(response, spent)
 
-    def process_spider_exception(self, response, exception, spider):
-        # Called when a spider or process_spider_input() method
-        # (from other spider middleware) raises an exception.
+    def record_callback(self, response, spent):
+        callback = response.request.callback if response.request is not None else None
+        name = getattr(callback, "__name__", None) or "parse"
+        observe(self.stats, "callback_cpu", name, spent, CPU_BUCKETS)
 
-        # Should return either None or an iterable of Request or item objects.
-        pass
+    def spider_opened(self, spider):
+        spider.logger.info("Instrumentation enabled for %s" % spider.name)
 
-    def process_start_requests(self, start_requests, spider):
-        # Called with the start requests of the spider, and works
-        # similarly to the process_spider_output() method, except
-        # that it doesn’t have a response associated.
 
-        # Must return only requests (not items).
-        for r in start_requests:
-            yield r
+class RequestCoalescingMiddleware:
+    # Single-flight downloads: a request whose method + URL + body matches
+    # one already in flight waits for that response instead of going out
+    # again, and a match completed less than COALESCE_MEMO_TTL seconds ago
+    # is answered from memory (at most COALESCE_MEMO_MAX_BYTES of bodies,
+    # oldest dropped first). The in-flight map and memo are shared by
+    # every crawler in the process, so two spiders (or two fallback chains
+    # in one spider) fetching the same page send it once.
+    #
+    # Sits at 530, before the response cache, so waiting copies skip the
+    # cache too. Copies carry the "cached" and "coalesced" flags: the cache,
+    # throttle and latency histograms ignore them like cache hits. Should
+    # the first request fail (or not come back within COALESCE_WAIT), the
+    # waiting ones are downloaded after all. meta["dont_coalesce"] opts out;
+    # requests that may be cancelled mid-flight should set it, as a
+    # cancelled download never reaches process_response to release its
+    # followers.
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+    inflight = {}
+    memo = OrderedDict()
+    memo_bytes = 0
+
+    def __init__(self, stats, memo_ttl=5, memo_max_bytes=8 * 1024 * 1024, wait=180):
+        self.stats = stats
+        self.memo_ttl = memo_ttl
+        self.memo_max_bytes = memo_max_bytes
+        self.wait = wait
+        self.leading = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("COALESCE_ENABLED"):
+            raise NotConfigured
+        s = cls(
+            crawler.stats,
+            memo_ttl=settings.getfloat("COALESCE_MEMO_TTL", 5),
+            memo_max_bytes=settings.getint("COALESCE_MEMO_MAX_BYTES", 8 * 1024 * 1024),
+            wait=settings.getfloat("COALESCE_WAIT", settings.getfloat("DOWNLOAD_TIMEOUT", 180)),
+        )
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    async def process_request(self, request, spider):
+        # Retries and redirects of a request that is already leading
+        if request.meta.get("dont_coalesce") or "coalesce_key" in request.meta:
+            return None
+
+        key = request_key(request)
+        recent = self.memo.get(key)
+        if recent is not None:
+            stored_at, response = recent
+            if time.monotonic() - stored_at <= self.memo_ttl:
+                self.stats.inc_value("coalesce/memo_hit")
+                return self.copy(request, response)
+
+        pending = self.inflight.get(key)
+        if pending is None:
+            self.inflight[key] = asyncio.get_running_loop().create_future()
+            self.leading.add(key)
+            request.meta["coalesce_key"] = key
+            return None
+
+        self.stats.inc_value("coalesce/inflight_hit")
+        try:
+            response = await asyncio.wait_for(asyncio.shield(pending), self.wait)
+        except asyncio.TimeoutError:
+            # Lost leader: let the next request for this key lead instead
+            if self.inflight.get(key) is pending:
+                del self.inflight[key]
+            response = None
+        if response is None:
+            self.stats.inc_value("coalesce/fallback")
+            request.meta["dont_coalesce"] = True
+            return None
+        return self.copy(request, response)
+
+    def process_response(self, request, response, spider):
+        key = request.meta.get("coalesce_key")
+        if key is None or "coalesced" in response.flags:
+            return response
+
+        # Throttling and server errors are not worth sharing
+        if response.status < 500 and response.status != 429:
+            self.remember(key, response)
+            self.resolve(key, response)
+        else:
+            self.resolve(key, None)
+        return response
+
+    def remember(self, key, response):
+        cls = type(self)
+        now = time.monotonic()
+        if key in self.memo:
+            cls.memo_bytes -= len(self.memo.pop(key)[1].body)
+        if self.memo_ttl > 0 and len(response.body) <= self.memo_max_bytes:
+            # A copy, so the memo doesn't pin the decoded text and selectors
+            # the callback caches on the original
+            self.memo[key] = (now, response.replace())
+            cls.memo_bytes += len(response.body)
+
+        # Oldest first: drop expired entries, then whatever exceeds the budget
+        while self.memo:
+            stored_at, oldest = next(iter(self.memo.values()))
+            if now - stored_at <= self.memo_ttl and cls.memo_bytes <= self.memo_max_bytes:
+                break
+            self.memo.popitem(last=False)
+            cls.memo_bytes -= len(oldest.body)
+
+    def process_exception(self, request, exception, spider):
+        key = request.meta.get("coalesce_key")
+        if key is not None:
+            self.resolve(key, None)
+
+    def resolve(self, key, response):
+        self.leading.discard(key)
+        pending = self.inflight.pop(key, None)
+        if pending is not None and not pending.done():
+            pending.set_result(response)
+
+    def spider_closed(self, spider):
+        # Other crawlers in the process may be waiting on this one's requests
+        for key in list(self.leading):
+            self.resolve(key, None)
+
+    def copy(self, request, response):
+        flags = [f for f in response.flags if f not in ("cached", "coalesced")]
+        return response.replace(request=request, flags=flags + ["cached", "coalesced"])
 
 
 class IcmbDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    # Response cache keyed on method + URL + body (see ICMB.httpcache).
+    #
+    # RESPONSE_CACHE_MODE:
+    #   "normal"  serve fresh entries, fetch and store everything else
+    #   "replay"  serve whatever is cached, however old; a miss is ignored
+    #             instead of downloaded, so offline runs never touch the network
+    #   "off"     pass everything through
+    #
+    # Freshness is per host (RESPONSE_CACHE_TTLS, matched on the host or any
+    # parent domain); a TTL of 0 disables caching for that host. Keys of the
+    # form "host/path" apply to URLs under that path and win over the bare
+    # host, so APIs can expire sooner than the pages they describe. Only 200
+    # responses are stored, and requests with meta["dont_cache"] bypass the cache.
+    # meta["cache_refresh"] skips a fresh entry but stores the new response,
+    # for pages known to have changed since they were cached.
+    #
+    # Stale entries that carried an ETag or Last-Modified are revalidated
+    # rather than refetched: the request goes out with If-None-Match /
+    # If-Modified-Since, and a 304 is answered with the cached body as a 200,
+    # so callbacks never see the difference.
+
+    MODES = ("normal", "replay", "off")
+    VALIDATORS = (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since"))
+
+    def __init__(self, cache, mode, ttls, default_ttl, stats):
+        self.cache = cache
+        self.mode = mode
+        self.ttls = {}
+        # host -> [(path prefix, ttl)], longest prefix first
+        self.path_ttls = {}
+        for key, ttl in ttls.items():
+            host, slash, path = key.partition("/")
+            if slash:
+                self.path_ttls.setdefault(host, []).append(("/" + path, ttl))
+            else:
+                self.ttls[host] = ttl
+        for rules in self.path_ttls.values():
+            rules.sort(key=lambda rule: len(rule[0]), reverse=True)
+        self.default_ttl = default_ttl
+        self.stats = stats
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        settings = crawler.settings
+        mode = settings.get("RESPONSE_CACHE_MODE", "off")
+        if mode not in cls.MODES:
+            raise NotConfigured(f"RESPONSE_CACHE_MODE must be one of {', '.join(cls.MODES)}")
+        if mode == "off":
+            raise NotConfigured
+
+        cache = DiskResponseCache(
+            settings.get("RESPONSE_CACHE_DIR", ".icmb/httpcache"),
+            settings.getint("RESPONSE_CACHE_MAX_BYTES", 512 * 1024 * 1024),
+        )
+        s = cls(
+            cache,
+            mode,
+            settings.getdict("RESPONSE_CACHE_TTLS"),
+            settings.getint("RESPONSE_CACHE_DEFAULT_TTL", 3600),
+            crawler.stats,
+        )
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
 
+    def ttl_for(self, request):
+        parsed = urlparse_cached(request)
+        host = parsed.hostname or ""
+        path = parsed.path or "/"
+        while host:
+            for prefix, ttl in self.path_ttls.get(host, ()):
+                if path.startswith(prefix):
+                    return ttl
+            if host in self.ttls:
+                return self.ttls[host]
+            host = host.partition(".")[2]
+        return self.default_ttl
+
+    def is_fresh(self, entry, ttl):
+        return ttl > 0 and time.time() - entry["stored_at"] < ttl
+
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+        if request.meta.get("dont_cache"):
+            return None
+
+        ttl = self.ttl_for(request)
+        if ttl <= 0 and self.mode != "replay":
+            return None
+
+        entry = self.cache.get(request_key(request))
+        if entry is not None and self.mode != "replay" and request.meta.get("cache_refresh"):
+            self.stats.inc_value("response_cache/refresh")
+            return None
+        if entry is not None and (self.mode == "replay" or self.is_fresh(entry, ttl)):
+            self.stats.inc_value("response_cache/hit")
+            return self.build_response(request, entry)
+
+        if self.mode == "replay":
+            self.stats.inc_value("response_cache/replay_miss")
+            raise IgnoreRequest(f"Not in response cache: {request.method} {request.url}")
+
+        if entry is not None and self.add_validators(request, entry):
+            request.meta["cache_revalidating"] = True
+            self.stats.inc_value("response_cache/revalidate")
+            return None
+
+        self.stats.inc_value("response_cache/miss")
         return None
 
+    def add_validators(self, request, entry):
+        stored = Headers(entry["headers"])
+        added = False
+        for validator, conditional in self.VALIDATORS:
+            value = stored.get(validator)
+            if value and conditional not in request.headers:
+                request.headers[conditional] = value
+                added = True
+        return added
+
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+        if response.status == 304 and request.meta.get("cache_revalidating"):
+            return self.not_modified(request, response)
+
+        if (
+            self.mode != "normal"
+            or "cached" in response.flags
+            or response.status != 200
+            or request.meta.get("dont_cache")
+            or self.ttl_for(request) <= 0
+        ):
+            return response
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        self.cache.put(
+            request_key(request),
+            response.url,
+            response.status,
+            {
+                k.decode("latin-1"): [v.decode("latin-1") for v in values]
+                for k, values in response.headers.items()
+            },
+            response.body,
+        )
+        self.stats.inc_value("response_cache/store")
         return response
 
-    def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+    def not_modified(self, request, response):
+        key = request_key(request)
+        entry = self.cache.get(key)
+        if entry is None:
+            # Evicted while the request was in flight: fetch it in full
+            retry = request.replace(dont_filter=True)
+            for _, conditional in self.VALIDATORS:
+                retry.headers.pop(conditional, None)
+            retry.meta.pop("cache_revalidating", None)
+            return retry
+
+        self.cache.touch(key)
+        self.stats.inc_value("response_cache/not_modified")
+        self.stats.inc_value("response_cache/bytes_saved", max(len(entry["body"]) - len(response.body), 0))
+        return self.build_response(request, entry)
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+    def build_response(self, request, entry):
+        headers = Headers(entry["headers"])
+        respcls = responsetypes.from_args(headers=headers, url=entry["url"], body=entry["body"])
+        return respcls(
+            url=entry["url"],
+            status=entry["status"],
+            headers=headers,
+            body=entry["body"],
+            flags=["cached"],
+            request=request,
+        )
 
     def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        spider.logger.info(
+            "Response cache (%s): %s, %.1f MB used",
+            self.mode, self.cache.directory, self.cache.total_bytes / 1e6
+        )
+
+    def spider_closed(self, spider):
+        self.cache.close()
+
+
+class AdaptiveThrottleMiddleware:
+    # Per-host AIMD on top of DOWNLOAD_SLOTS.
+    #
+    # Sits at 560, just outside RetryMiddleware (550), so it sees 429/503
+    # before they are retried. A throttling response halves the slot's
+    # concurrency and at least doubles its delay (never below Retry-After);
+    # after a cool-down, every window of healthy responses (latency under
+    # ADAPTIVE_THROTTLE_TARGET_LATENCY) first walks the delay back to its
+    # configured value and then adds one to the concurrency, up to the
+    # host's ceiling in ADAPTIVE_THROTTLE_CEILINGS (default: its starting
+    # concurrency). Slow responses take one away.
+
+    BACKOFF_CODES = (429, 503)
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.target_latency = settings.getfloat("ADAPTIVE_THROTTLE_TARGET_LATENCY", 1.5)
+        self.max_delay = settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY", 60)
+        self.cooldown = settings.getfloat("ADAPTIVE_THROTTLE_COOLDOWN", 30)
+        self.ceilings = settings.getdict("ADAPTIVE_THROTTLE_CEILINGS")
+        self.limits = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_THROTTLE_ENABLED"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_response(self, request, response, spider):
+        if "cached" in response.flags:
+            return response
+
+        key = request.meta.get("download_slot")
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return response
+
+        state = self.limits.get(key)
+        if state is None or state["slot"] is not slot:
+            # First response for this host, or its idle slot was recreated
+            state = self.limits[key] = {
+                "slot": slot,
+                "base_delay": slot.delay,
+                "ceiling": self.ceilings.get(key, slot.concurrency),
+                "healthy": 0,
+                "backed_off_at": 0,
+                "calm_after": 0,
+            }
+
+        if response.status in self.BACKOFF_CODES:
+            # Requests already in flight when we backed off say nothing new
+            sent_at = time.time() - request.meta.get("download_latency", 0)
+            if sent_at >= state["backed_off_at"]:
+                self.back_off(key, slot, state, self.retry_after(response))
+        else:
+            self.observe(key, slot, state, request.meta.get("download_latency"))
+
+        return response
+
+    def retry_after(self, response):
+        value = response.headers.get("Retry-After")
+        if not value:
+            return 0
+
+        value = value.decode("latin-1").strip()
+        if value.isdigit():
+            return int(value)
+
+        try:
+            wait = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return 0
+        return max(wait, 0)
+
+    def back_off(self, key, slot, state, retry_after):
+        slot.concurrency = max(1, slot.concurrency // 2)
+        slot.delay = min(max(slot.delay * 2, state["base_delay"], 1.0, retry_after), self.max_delay)
+        state["healthy"] = 0
+        state["backed_off_at"] = time.time()
+        state["calm_after"] = state["backed_off_at"] + max(self.cooldown, retry_after)
+
+        self.stats.inc_value("throttle/backoff")
+        self.stats.inc_value(f"throttle/{key}/backoff")
+        self.record(key, slot)
+        self.crawler.spider.logger.info(
+            "Throttled by %s: concurrency %d, delay %.1fs", key, slot.concurrency, slot.delay
+        )
+
+    def observe(self, key, slot, state, latency):
+        if latency is None or time.time() < state["calm_after"]:
+            return
+
+        if latency > 2 * self.target_latency:
+            if slot.concurrency > 1:
+                slot.concurrency -= 1
+                self.record(key, slot)
+            state["healthy"] = 0
+            return
+
+        if latency > self.target_latency:
+            return
+
+        state["healthy"] += 1
+        if state["healthy"] < slot.concurrency:
+            return
+
+        state["healthy"] = 0
+        if slot.delay > state["base_delay"]:
+            slot.delay /= 2
+            if slot.delay - state["base_delay"] < 0.1:
+                slot.delay = state["base_delay"]
+        elif slot.concurrency < state["ceiling"]:
+            slot.concurrency += 1
+        else:
+            return
+        self.record(key, slot)
+
+    def record(self, key, slot):
+        self.stats.set_value(f"throttle/{key}/concurrency", slot.concurrency)
+        self.stats.set_value(f"throttle/{key}/delay", round(slot.delay, 2))
@@ -0,0 +1,121 @@
+# Normalizers shared by the spiders: release dates, runtimes, film titles
+# and PVR film names.
+#
+# Patterns are compiled once at import. Dates are matched against a small
+# table of the formats Wikipedia infoboxes use instead of trying strptime
+# formats through exceptions. The same strings come back on every page of a
+# crawl (and every run), so results are memoized.
+
+import re
+from calendar import monthrange
+from functools import lru_cache
+
+MONTH_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+MONTH_NAMES = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+)
+
+# "december", "dec", "dec." and "sept" -> 12 / 9
+MONTHS = {name: n for n, name in enumerate(MONTH_NAMES, start=1)}
+MONTHS.update({name[:3]: n for name, n in list(MONTHS.items())})
+MONTHS["sept"] = 9
+
+MONTH = r"(?P<month>" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\b\.?"
+DASH = r"\s*[-–—]\s*"
+
+# (pattern, example), tried in order; a pattern's first match anywhere in
+# the text wins, so a cell listing several releases yields the first (main)
+# one. Day ranges ("9–11 January 2026") resolve to their first day; ranges
+# across months only give their end date, as the start lacks a year.
+DATE_FORMATS = [
+    (re.compile(r"\b(?P<year>\d{4})-(?P<num_month>\d{2})-(?P<day>\d{2})\b"), "2026-01-09"),
+    (re.compile(rf"\b(?P<day>\d{{1,2}})(?:{DASH}\d{{1,2}})?\s+{MONTH},?\s+(?P<year>\d{{4}})\b", re.I),
+     "9 January 2026"),
+    (re.compile(rf"\b{MONTH}\s+(?P<day>\d{{1,2}})(?:{DASH}\d{{1,2}})?,?\s+(?P<year>\d{{4}})\b", re.I),
+     "January 9, 2026"),
+]
+
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+PARENS_RE = re.compile(r"\(.*?\)")
+CITATION_RE = re.compile(r"\[\s*(?:\d+|[a-z]|note \d+)\s*\]", re.I)
+
+# "2 hours 43 minutes", "2h 32m", "2 hrs 50 mins", "1.5 hours", "148 min"
+RUNTIME_RE = re.compile(
+    r"(?P<hours>\d+(?:\.\d+)?)\s*(?:hours?|hrs?|h)(?![a-z])\.?,?\s*(?:(?:and\s+)?(?P<hm>\d+)\s*(?:minutes?|mins?|m)(?![a-z]))?"
+    r"|(?P<minutes>\d+)\s*(?:minutes?|mins?|m)(?![a-z])",
+    re.I
+)
+
+PVR_LANGUAGES = ("TAMIL", "TELUGU", "HINDI", "KANNADA", "MALAYALAM")
+# "SIRAI (TAMIL)", "SIRAI (TAMIL) (U/A)", "SIRAI TAMIL 3D"
+PVR_LANGUAGE_RE = re.compile(r"\((" + "|".join(PVR_LANGUAGES) + r")| (" + "|".join(PVR_LANGUAGES) + r") ")
+
+
+def parse_date(text):
+    # First recognised date in text as (year, month, day), or None
+    for pattern, _ in DATE_FORMATS:
+        for m in pattern.finditer(text):
+            parts = m.groupdict()
+            month = int(parts["num_month"]) if parts.get("num_month") else MONTHS[parts["month"].lower()]
+            year, day = int(parts["year"]), int(parts["day"])
+            if 1 <= month <= 12 and 1 <= day <= monthrange(year, month)[1]:
+                return year, month, day
+    return None
+
+
+@lru_cache(maxsize=4096)
+def release_date(raw):
+    # "9 January 2026 (India)" -> "09-Jan-2026"; text without a recognised
+    # date comes back with the parenthesised notes removed
+    if not raw:
+        return ""
+    cleaned = PARENS_RE.sub("", raw).strip()
+    found = parse_date(cleaned)
+    if found is None:
+        return cleaned
+    year, month, day = found
+    return f"{day:02d}-{MONTH_ABBR[month - 1]}-{year}"
+
+
+@lru_cache(maxsize=4096)
+def release_year(raw):
+    m = YEAR_RE.search(raw or "")
+    return m.group(0) if m else ""
+
+
+@lru_cache(maxsize=4096)
+def runtime(raw):
+    # "2 hours 43 minutes [1]" -> "163 min"; unrecognised text is kept
+    if not raw:
+        return ""
+    m = RUNTIME_RE.search(raw)
+    if m is None:
+        return raw
+    if m.group("minutes"):
+        return f"{int(m.group('minutes'))} min"
+    minutes = round(float(m.group("hours")) * 60) + int(m.group("hm") or 0)
+    return f"{minutes} min"
+
+
+@lru_cache(maxsize=4096)
+def movie_title(title):
+    # "Sirai_(2025_film)" -> "Sirai (2025)"
+    title = title.replace("_", " ")
+    m = YEAR_RE.search(title)
+    name = " ".join(title.split("(")[0].split())
+    return f"{name} ({m.group(0)})" if m else name
+
+
+@lru_cache(maxsize=4096)
+def pvr_film(raw_name):
+    # "SIRAI (TAMIL)" -> ("SIRAI", "TAMIL"); language "UNKNOWN" when the
+    # name carries none of PVR_LANGUAGES
+    raw_name = raw_name.upper().strip()
+    m = PVR_LANGUAGE_RE.search(raw_name)
+    language = (m.group(1) or m.group(2)) if m else "UNKNOWN"
+    return raw_name.split("(")[0].strip(), language
+
+
+def strip_citations(text):
+    return CITATION_RE.sub("", text)
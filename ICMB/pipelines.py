@@ -3,11 +3,223 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from scrapy.exceptions import DropItem
+from scrapy.utils.misc import load_object
+from twisted.internet import task
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from ICMB.checkpoint import checkpoint_saving
+from ICMB.entities import EntityIndex
+from ICMB.items import export_dict
+from ICMB.store import TTLStore
+
+
+class StoragePipeline:
+    # Buffers items per table and upserts them in batches on the spider's
+    # natural key (spider.STORAGE_TABLE / spider.item_key). A batch is
+    # written once STORAGE_BATCH_SIZE items are buffered or
+    # STORAGE_FLUSH_INTERVAL seconds have passed, and on close.
+
+    def __init__(self, backend, batch_size=500, flush_interval=30):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = {}
+        self.buffered = 0
+        self.last_flush = time.monotonic()
+        self.flush_task = None
+        self.stats = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        backend_cls = load_object(settings.get("STORAGE_BACKEND", "ICMB.storage.SqliteBackend"))
+        pipeline = cls(
+            backend_cls.from_settings(settings),
+            batch_size=settings.getint("STORAGE_BATCH_SIZE", 500),
+            flush_interval=settings.getfloat("STORAGE_FLUSH_INTERVAL", 30),
+        )
+        pipeline.stats = crawler.stats
+        # Items are written before a checkpoint drops the work behind them
+        crawler.signals.connect(pipeline.flush, signal=checkpoint_saving)
+        return pipeline
+
+    def open_spider(self, spider):
+        if self.flush_interval > 0:
+            self.flush_task = task.LoopingCall(self.flush_if_due)
+            self.flush_task.start(self.flush_interval, now=False)
+
+    def close_spider(self, spider):
+        if self.flush_task is not None and self.flush_task.running:
+            self.flush_task.stop()
+        self.flush()
+        self.backend.close()
+
+    def process_item(self, item, spider):
+        table = getattr(spider, "STORAGE_TABLE", None)
+        if table is None:
+            return item
+
+        key = spider.item_key(item)
+        # Later items for the same key replace earlier ones within a batch
+        self.buffer.setdefault(table, {})[key] = export_dict(item)
+        self.buffered += 1
+
+        if self.buffered >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+        return item
+
+    def flush_if_due(self):
+        if self.flush_interval > 0 and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.buffered:
+            return
+
+        for table, rows in self.buffer.items():
+            self.backend.write_batch(table, list(rows.items()))
+            if self.stats is not None:
+                self.stats.inc_value(f"storage/{table}/written", len(rows))
+
+        if self.stats is not None:
+            self.stats.inc_value("storage/flushes")
+
+        self.buffer = {}
+        self.buffered = 0
+
+
+class ChangeDetectionPipeline:
+    # Keeps a content hash per record key across runs and tags every item
+    # with change_status new / changed / unchanged. Unchanged items are
+    # dropped when CHANGES_DROP_UNCHANGED is set, and every new or changed
+    # record is appended to the CHANGES_LOG JSON lines file.
+    #
+    # Spiders may list CHANGE_FIELDS to hash only the fields that matter
+    # downstream; otherwise the whole record is hashed.
+
+    STATUS_FIELD = "change_status"
+
+    def __init__(self, store, log_path=None, drop_unchanged=False):
+        self.store = store
+        self.log_path = log_path
+        self.drop_unchanged = drop_unchanged
+        self.log = None
+        self.stats = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        pipeline = cls(
+            TTLStore.from_settings(settings, "content_hashes"),
+            log_path=settings.get("CHANGES_LOG"),
+            drop_unchanged=settings.getbool("CHANGES_DROP_UNCHANGED", False),
+        )
+        pipeline.stats = crawler.stats
+        return pipeline
+
+    def open_spider(self, spider):
+        if self.log_path:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+            self.log = open(self.log_path, "a", encoding="utf-8")
+
+    def close_spider(self, spider):
+        if self.log is not None:
+            self.log.close()
+        self.store.close()
+
+    def content_hash(self, item, spider):
+        data = export_dict(item)
+        data.pop(self.STATUS_FIELD, None)
+        # Assigned after this pipeline, by EntityPipeline
+        data.pop("film_id", None)
+
+        fields = getattr(spider, "CHANGE_FIELDS", None)
+        if fields:
+            data = {f: data.get(f) for f in fields}
+
+        encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+    def process_item(self, item, spider):
+        table = getattr(spider, "STORAGE_TABLE", None)
+        if table is None:
+            return item
+
+        key = f"{table}:{spider.item_key(item)}"
+        digest = self.content_hash(item, spider)
+        previous = self.store.get(key)
+
+        if previous is None:
+            status = "new"
+        elif previous == digest:
+            status = "unchanged"
+        else:
+            status = "changed"
+
+        self.stats.inc_value(f"changes/{status}")
+        ItemAdapter(item)[self.STATUS_FIELD] = status
+
+        if status == "unchanged":
+            if self.drop_unchanged:
+                raise DropItem(f"Unchanged since last run: {key}")
+            return item
+
+        self.store.set(key, digest)
+        if self.log is not None:
+            self.log.write(json.dumps({
+                "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "spider": spider.name,
+                "key": key,
+                "status": status,
+                "hash": digest,
+            }, ensure_ascii=False) + "\n")
+
+        return item
+
+
+class EntityPipeline:
+    # Tags every item with the canonical film_id of ICMB.entities, so PVR,
+    # OTTplay and Wikipedia records of the same film can be joined. Spiders
+    # describe their items with entity_ref(item) -> (name, language, year,
+    # source references); items of other spiders pass through.
+
+    def __init__(self, index):
+        self.index = index
+        self.stats = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(EntityIndex.open(crawler.settings))
+        pipeline.stats = crawler.stats
+        return pipeline
+
+    def close_spider(self, spider):
+        self.index.release()
 
-class IcmbPipeline:
     def process_item(self, item, spider):
+        entity_ref = getattr(spider, "entity_ref", None)
+        if entity_ref is None:
+            return item
+
+        name, language, year, refs = entity_ref(item)
+        film_id, how = self.index.add(name, language, year, refs)
+        if film_id is None:
+            self.stats.inc_value("entities/unnamed")
+            return item
+
+        self.stats.inc_value(f"entities/{how}")
+        ItemAdapter(item)["film_id"] = film_id
         return item
@@ -0,0 +1,170 @@
+# Runs the three spiders in one process and one reactor:
+#
+#     pvr_now_showing_wiki ──(Wikipedia URLs)──> wiki_movie_full
+#     ottplay_latest (alongside)
+#
+# wiki_movie_full is started in stream mode and is fed every article the
+# now-showing spider resolves as soon as the item is out of the pipelines,
+# so the full-article crawl overlaps the PVR and search crawl instead of
+# waiting for it. Its feed ends when pvr_now_showing_wiki finishes. One
+# summary of all three crawls is printed at the end.
+#
+#     python -m ICMB.run
+#     python -m ICMB.run --cities Chennai,Pune --no-ott
+#     python -m ICMB.run --wiki-fetch api --incremental -s LOG_LEVEL=WARNING
+#     python -m ICMB.run --ott-from 2026-01-01 --stats-json run-stats.json
+#     python -m ICMB.run --job nightly     # rerun after a crash to resume
+
+import argparse
+import json
+import sys
+import time
+
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+# Stats shown per spider in the summary, as (column, stats key)
+SUMMARY = [
+    ("items", "item_scraped_count"),
+    ("dropped", "item_dropped_count"),
+    ("requests", "downloader/request_count"),
+    ("responses", "downloader/response_count"),
+    ("MB", "downloader/response_bytes"),
+    ("errors", "log_count/ERROR"),
+]
+
+
+class WikiFeed:
+    # Passes the Wikipedia URLs of pvr_now_showing_wiki's items on to a
+    # streaming wiki_movie_full. Signal receivers are held weakly, so the
+    # runner keeps this object alive for the whole crawl.
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.fed = 0
+        source.signals.connect(self.item_seen, signal=signals.item_scraped)
+        # Films unchanged since the last run are dropped before export but
+        # still need their articles refreshed
+        source.signals.connect(self.item_seen, signal=signals.item_dropped)
+
+    def item_seen(self, item, **kwargs):
+        url = getattr(item, "wikipedia", "")
+        if url and url.startswith("http"):
+            self.fed += 1
+            self.target.spider.feed(url)
+
+    def close(self, result=None):
+        # Called when the now-showing crawl is over, whatever its outcome
+        if self.target.spider is not None:
+            self.target.spider.end_feed()
+        return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ICMB.run")
+    parser.add_argument("--cities", help="comma-separated PVR cities (default: all)")
+    parser.add_argument("--wiki-fetch", choices=["html", "api"], help="wiki_movie_full fetch mode")
+    parser.add_argument("--incremental", action="store_true", help="only re-fetch articles whose revision changed")
+    parser.add_argument("--ott-from", help="ottplay_latest window start (YYYY-MM-DD)")
+    parser.add_argument("--ott-to", help="ottplay_latest window end (YYYY-MM-DD)")
+    parser.add_argument("--no-ott", action="store_true", help="skip ottplay_latest")
+    parser.add_argument("-s", "--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a setting for all spiders (repeatable)")
+    parser.add_argument("--stats-json", help="also write every spider's stats to this file")
+    parser.add_argument("--job", help="job id: checkpoint every spider and resume an interrupted run (ICMB.checkpoint)")
+    return parser.parse_args(argv)
+
+
+def spider_args(args):
+    now_showing = {}
+    if args.cities:
+        now_showing["cities"] = args.cities
+
+    wiki = {"stream": "true"}
+    if args.wiki_fetch:
+        wiki["fetch"] = args.wiki_fetch
+    if args.incremental:
+        wiki["incremental"] = "true"
+
+    ott = {}
+    if args.ott_from:
+        ott["from_date"] = args.ott_from
+    if args.ott_to:
+        ott["to_date"] = args.ott_to
+    return now_showing, wiki, ott
+
+
+def summary(crawlers, wall):
+    header = f"{'spider':<22} {'reason':<10} {'seconds':>8}" + "".join(f" {col:>9}" for col, _ in SUMMARY)
+    lines = [header, "-" * len(header)]
+    totals = dict.fromkeys((col for col, _ in SUMMARY), 0)
+
+    for crawler in crawlers:
+        stats = crawler.stats
+        row = f"{crawler.spidercls.name:<22} {str(stats.get_value('finish_reason', '-')):<10} " \
+              f"{stats.get_value('elapsed_time_seconds', 0):>8.1f}"
+        for col, key in SUMMARY:
+            value = stats.get_value(key, 0)
+            totals[col] += value
+            row += f" {value / 1048576:>9.1f}" if col == "MB" else f" {value:>9}"
+        lines.append(row)
+
+    lines.append("-" * len(header))
+    row = f"{'total':<22} {'':<10} {wall:>8.1f}"
+    for col, _ in SUMMARY:
+        row += f" {totals[col] / 1048576:>9.1f}" if col == "MB" else f" {totals[col]:>9}"
+    lines.append(row)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    settings = get_project_settings()
+    for pair in args.set:
+        name, sep, value = pair.partition("=")
+        if not sep:
+            sys.exit(f"-s expects NAME=VALUE, got {pair!r}")
+        settings.set(name, value, priority="cmdline")
+    if args.job:
+        settings.set("JOB_ID", args.job, priority="cmdline")
+
+    now_showing_args, wiki_args, ott_args = spider_args(args)
+    process = CrawlerProcess(settings)
+    started = time.monotonic()
+
+    # The wiki spider has to exist before the first item can be fed to it.
+    # It is also the first crawler created, the one that installs the reactor
+    wiki = process.create_crawler("wiki_movie_full")
+    now_showing = process.create_crawler("pvr_now_showing_wiki")
+    crawlers = [now_showing, wiki]
+
+    process.crawl(wiki, **wiki_args)
+    feed = WikiFeed(now_showing, wiki)
+    process.crawl(now_showing, **now_showing_args).addBoth(feed.close)
+
+    if not args.no_ott:
+        ott = process.create_crawler("ottplay_latest")
+        crawlers.append(ott)
+        process.crawl(ott, **ott_args)
+
+    process.start()
+    wall = time.monotonic() - started
+
+    print(summary(crawlers, wall))
+    print(f"{feed.fed} Wikipedia URLs streamed to wiki_movie_full")
+
+    if args.stats_json:
+        with open(args.stats_json, "w", encoding="utf-8") as f:
+            json.dump({
+                "wall_seconds": round(wall, 3),
+                "spiders": {c.spidercls.name: c.stats.get_stats() for c in crawlers},
+            }, f, indent=2, default=str)
+
+    failed = [c.spidercls.name for c in crawlers if c.stats.get_value("finish_reason") != "finished"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
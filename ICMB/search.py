@@ -0,0 +1,76 @@
+# DuckDuckGo HTML search helpers shared by ottplay_latest and the
+# wiki_movie_full enrichment lookups.
+
+import urllib.parse
+
+from lxml import html
+
+SEARCH_URL = "https://duckduckgo.com/html/"
+
+SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0"
+}
+
+# Streaming platforms by preference, with the name published in the
+# "OTT Platform" column
+OTT_PLATFORMS = {
+    "hotstar.com": "JioHotstar",
+    "zee5.com": "ZEE5",
+    "sonyliv.com": "Sony LIV",
+    "primevideo.com": "Prime Video",
+    "lionsgateplay.com": "Lionsgate Play",
+    "aha.video": "aha",
+    "tataplaybinge.com": "Tata Play Binge",
+    "airtelxstream.in": "Airtel Xstream",
+    "sunnxt.com": "Sun NXT",
+    "netflix.com": "Netflix",
+}
+OTT_PRIORITY = list(OTT_PLATFORMS)
+
+
+def search_url(query):
+    return SEARCH_URL + "?" + urllib.parse.urlencode({"q": query})
+
+
+def extract_uddg_url(link):
+    # Result links point at duckduckgo.com/l/?uddg=<target>
+    if "uddg=" not in link:
+        return None
+
+    parsed = urllib.parse.urlparse(link)
+    qs = urllib.parse.parse_qs(parsed.query)
+    uddg = qs.get("uddg", [None])[0]
+
+    return urllib.parse.unquote(uddg) if uddg else None
+
+
+def parse_results(text):
+    # [(target url, snippet text)] in result order
+    tree = html.fromstring(text)
+    results = []
+    for node in tree.xpath("//div[contains(@class,'result__body')]"):
+        links = node.xpath(".//a[contains(@class,'result__a')]/@href")
+        url = extract_uddg_url(links[0]) if links else None
+        if url:
+            snippet = " ".join(node.xpath(".//*[contains(@class,'result__snippet')]//text()"))
+            results.append((url, " ".join(snippet.split())))
+    return results
+
+
+def result_links(text):
+    tree = html.fromstring(text)
+    links = []
+    for link in tree.xpath("//a[contains(@class,'result__a')]/@href"):
+        decoded = extract_uddg_url(link)
+        if decoded:
+            links.append(decoded)
+    return links
+
+
+def pick_link(links, domains):
+    # First link on the most preferred domain, None when no domain matches
+    for domain in domains:
+        for url in links:
+            if domain in url:
+                return url
+    return None
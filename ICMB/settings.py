@@ -20,7 +20,7 @@ NEWSPIDER_MODULE = "ICMB.spiders"
 ROBOTSTXT_OBEY = False
 
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-#CONCURRENT_REQUESTS = 32
+CONCURRENT_REQUESTS = 32
 
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
@@ -30,6 +30,67 @@ ROBOTSTXT_OBEY = False
 #CONCURRENT_REQUESTS_PER_DOMAIN = 16
 #CONCURRENT_REQUESTS_PER_IP = 16
 
+# Per-host download slots: Wikipedia is tolerant, the PVR API is fragile
+DOWNLOAD_SLOTS = {
+    "en.wikipedia.org": {"concurrency": 8, "delay": 0},
+    "api3.pvrcinemas.com": {"concurrency": 2, "delay": 0.5},
+    "api2.ottplay.com": {"concurrency": 4, "delay": 0.25},
+}
+
+# Back off per host on 429/503 (honouring Retry-After) and ramp back up
+# while latency stays under the target (ICMB.middlewares.AdaptiveThrottleMiddleware).
+# Hosts only grow past their starting concurrency up to their ceiling.
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE_TARGET_LATENCY = 1.5
+ADAPTIVE_THROTTLE_MAX_DELAY = 60
+ADAPTIVE_THROTTLE_COOLDOWN = 30
+ADAPTIVE_THROTTLE_CEILINGS = {
+    "en.wikipedia.org": 32,
+}
+
+# Number of DuckDuckGo OTT link lookups kept in flight by ottplay_latest
+# (DuckDuckGo's HTML endpoint throttles aggressively)
+OTT_LOOKUP_CONCURRENCY = 4
+OTT_LOOKUP_DELAY = 0.5
+
+# Candidate titles per Wikipedia titles= query (the API caps this at 50)
+WIKI_BATCH_SIZE = 50
+
+# Worker processes parsing articles for wiki_movie_full in html mode
+# (0: parse in the crawl process); the parse_workers argument overrides it
+WIKI_PARSE_WORKERS = 0
+
+# Trailer / OTT / soundtrack / CBFC rating lookups filling the columns the
+# infobox lacks (ICMB.enrichment); the enrich argument overrides WIKI_ENRICH.
+# Each source gets ENRICH_CONCURRENCY lookups in flight, and a film is
+# yielded once its lookups are done or ENRICH_DEADLINE seconds have passed.
+# Off by default: each film costs four extra searches (-a enrich=true).
+WIKI_ENRICH = False
+ENRICH_SOURCES = ["trailer", "ott", "soundtrack", "censorship"]
+ENRICH_CONCURRENCY = {
+    "trailer": 2,
+    "ott": 2,
+    "soundtrack": 1,
+    "censorship": 1,
+}
+ENRICH_DEADLINE = 30
+ENRICH_TIMEOUT = 12
+
+# Local state (search cache, indexes, snapshots) shared between runs
+ICMB_STATE_DB = ".icmb/state.sqlite"
+
+# Movie -> Wikipedia article index; films without an article are searched
+# again once their negative entry expires (TITLE_INDEX_TTL = 0: never expire;
+# TITLE_INDEX_NEGATIVE_TTL = 0: do not remember misses)
+TITLE_INDEX_TTL = 0
+TITLE_INDEX_NEGATIVE_TTL = 3 * 86400
+
+# Cache DuckDuckGo OTT lookups; misses expire sooner than found links
+# (a TTL of 0 keeps that kind of result out of the cache)
+OTT_CACHE_ENABLED = True
+OTT_CACHE_TTL = 7 * 86400
+OTT_CACHE_MISS_TTL = 86400
+
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
 
@@ -44,27 +105,87 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "ICMB.middlewares.IcmbSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    "ICMB.middlewares.IcmbSpiderMiddleware": 543,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "ICMB.middlewares.IcmbDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    "ICMB.middlewares.RequestCoalescingMiddleware": 530,
+    "ICMB.middlewares.IcmbDownloaderMiddleware": 543,
+    "ICMB.middlewares.AdaptiveThrottleMiddleware": 560,
+}
+
+# Local response cache (ICMB.middlewares.IcmbDownloaderMiddleware).
+# "normal": reuse fresh responses; "replay": offline, cache only; "off"
+RESPONSE_CACHE_MODE = "normal"
+RESPONSE_CACHE_DIR = ".icmb/httpcache"
+RESPONSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Seconds a stored response stays fresh, by host or parent domain, or by
+# "host/path" prefix (0: never cache). Article pages change slowly; the API
+# answers revision checks (incremental mode) and title/search lookups, which
+# must see edits and newly created articles
+RESPONSE_CACHE_TTLS = {
+    "api3.pvrcinemas.com": 15 * 60,
+    "api2.ottplay.com": 3600,
+    "duckduckgo.com": 86400,
+    "wikipedia.org": 7 * 86400,
+    "wikipedia.org/w/api.php": 5 * 60,
+}
+RESPONSE_CACHE_DEFAULT_TTL = 3600
+
+# Identical requests in flight at the same time go out once, and completed
+# ones are reused for COALESCE_MEMO_TTL seconds (RequestCoalescingMiddleware)
+COALESCE_ENABLED = True
+COALESCE_MEMO_TTL = 5
+COALESCE_MEMO_MAX_BYTES = 8 * 1024 * 1024
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    "ICMB.instrumentation.Instrumentation": 500,
+    "ICMB.checkpoint.Checkpoint": 510,
+}
+
+# Resumable crawls (ICMB.checkpoint): with a JOB_ID, outstanding work is saved
+# to CHECKPOINT_DIR/<JOB_ID>/<spider>.json.gz every CHECKPOINT_INTERVAL
+# seconds and on early stops, and a rerun with the same JOB_ID resumes it
+JOB_ID = None
+CHECKPOINT_DIR = ".icmb/jobs"
+CHECKPOINT_INTERVAL = 60
+
+# Latency / response size / callback CPU / items-per-second histograms in the
+# crawl stats (ICMB.instrumentation), dumped to a JSON report at close and,
+# if a path is set, to a Prometheus text file every INSTRUMENTATION_INTERVAL
+INSTRUMENTATION_ENABLED = True
+INSTRUMENTATION_REPORT = ".icmb/reports/{spider}.json"
+INSTRUMENTATION_INTERVAL = 10
+#INSTRUMENTATION_PROMETHEUS_FILE = ".icmb/reports/{spider}.prom"
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "ICMB.pipelines.IcmbPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "ICMB.pipelines.ChangeDetectionPipeline": 300,
+    "ICMB.pipelines.EntityPipeline": 350,
+    "ICMB.pipelines.StoragePipeline": 400,
+}
+
+# Canonical film ids across PVR, OTTplay and Wikipedia records: names
+# matching no film exactly are linked by trigram (Dice) similarity at or
+# above this threshold
+ENTITY_MATCH_THRESHOLD = 0.8
+
+# Tag items new/changed/unchanged against the previous run's content hash;
+# drop unchanged ones to publish only diffs
+CHANGES_DROP_UNCHANGED = False
+CHANGES_LOG = ".icmb/changes.jsonl"
+
+# Batched upserts of scraped items into a local database
+STORAGE_BACKEND = "ICMB.storage.SqliteBackend"
+STORAGE_SQLITE_PATH = ".icmb/items.sqlite"
+STORAGE_BATCH_SIZE = 500
+STORAGE_FLUSH_INTERVAL = 30
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
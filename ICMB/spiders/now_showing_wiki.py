@@ -1,6 +1,9 @@
 import scrapy
 import json
-import urllib.parse
+
+from ICMB import normalize, wikipedia
+from ICMB.items import NowShowingItem, export_fields
+from ICMB.title_index import TitleIndex
 
 
 class PvrNowShowingWikiSpider(scrapy.Spider):
@@ -10,13 +13,18 @@ class PvrNowShowingWikiSpider(scrapy.Spider):
     # =========================
     # CONFIG
     # =========================
-    city = "Bengaluru"
+    CITIES = [
+        "Bengaluru", "Chennai", "Hyderabad", "Mumbai",
+        "Delhi-NCR", "Kolkata", "Pune", "Kochi",
+    ]
 
-    PVR_URL = "https://api3.pvrcinemas.com/api/v1/booking/content/nowshowing"
+    custom_settings = {
+        "FEED_EXPORT_FIELDS": export_fields(NowShowingItem),
+    }
 
-    LANGUAGES = [
-        "TAMIL", "TELUGU", "HINDI", "KANNADA","MALAYALAM",
-    ]
+    STORAGE_TABLE = "now_showing"
+
+    PVR_URL = "https://api3.pvrcinemas.com/api/v1/booking/content/nowshowing"
 
     PVR_HEADERS  = {
   'accept': 'application/json, text/plain, */*',
@@ -24,7 +32,6 @@ class PvrNowShowingWikiSpider(scrapy.Spider):
   'appversion': '1.0',
   'cache-control': 'no-cache',
   'chain': 'PVR',
-  'city': 'Bengaluru',
   'content-type': 'application/json',
   'country': 'INDIA',
   'origin': 'https://www.pvrcinemas.com',
@@ -45,55 +52,235 @@ class PvrNowShowingWikiSpider(scrapy.Spider):
         "Accept": "application/json"
     }
 
+    # =========================
+    # SPIDER ARGUMENTS
+    # =========================
+    def __init__(self, cities=None, city=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # -a cities=Chennai,Pune for a subset, -a city=Chennai for one city
+        if cities:
+            self.cities = [c.strip() for c in cities.split(",") if c.strip()]
+        elif city:
+            self.cities = [city]
+        else:
+            self.cities = list(self.CITIES)
+
+        # (movie_name, language) -> cities showing it, merged across cities
+        self.films = {}
+        self.pending_cities = set(self.cities)
+
+        # Films still being looked up on Wikipedia: (movie_name, language) ->
+        # {"cities", "queries", "query_index"}; queries is None until the
+        # film falls back to full-text search. Kept here rather than in
+        # request meta so checkpoints (ICMB.checkpoint) carry it.
+        self.lookups = {}
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.title_index = TitleIndex.from_settings(crawler.settings)
+        return spider
+
+    def closed(self, reason):
+        self.title_index.close()
+
+    def item_key(self, item):
+        return f'{item.movie_name}|{item.language}'
+
+    def entity_ref(self, item):
+        # PVR listings carry no year; the resolved article links the film
+        refs = [f"wiki:{wikipedia.canonical_key(item.wikipedia)}"] if item.wikipedia.startswith("http") else []
+        return item.movie_name, item.language, "", refs
+
+    # =========================
+    # CHECKPOINTS
+    # =========================
+    def checkpoint_state(self):
+        return {
+            "films": [[name, language, cities] for (name, language), cities in self.films.items()],
+            "pending_cities": [city for city in self.cities if city in self.pending_cities],
+            "lookups": [[name, language, lookup] for (name, language), lookup in self.lookups.items()],
+        }
+
+    def restore_checkpoint(self, state):
+        self.films = {(name, language): cities for name, language, cities in state["films"]}
+        self.pending_cities = set(state["pending_cities"])
+        self.lookups = {(name, language): lookup for name, language, lookup in state["lookups"]}
+
     # =========================
     # START
     # =========================
+    async def start(self):
+        # Resumed lookups, then the PVR cities; see start_requests()
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
-        payload = json.dumps({"city": self.city})
-
-        yield scrapy.Request(
-            url=self.PVR_URL,
-            method="POST",
-            headers=self.PVR_HEADERS,
-            body=payload,
-            callback=self.parse_pvr
-        )
+        # Lookups left open by an interrupted run, then the cities that had
+        # not reported yet (all of them on a fresh run)
+        yield from self.resume_lookups()
+
+        for city in self.cities:
+            if city not in self.pending_cities:
+                continue
+            yield scrapy.Request(
+                url=self.PVR_URL,
+                method="POST",
+                headers={**self.PVR_HEADERS, "city": city},
+                body=json.dumps({"city": city}),
+                callback=self.parse_pvr,
+                errback=self.pvr_failed,
+                dont_filter=True,
+                cb_kwargs={"city": city}
+            )
 
     # =========================
     # PARSE PVR RESPONSE
     # =========================
-    def parse_pvr(self, response):
+    def parse_pvr(self, response, city):
         data = json.loads(response.text)
 
-        seen = set()
-
         for block in data.get("output", {}).get("mv", []):
             for film in block.get("films", []):
-                raw_name = film.get("filmName", "").upper().strip()
+                raw_name = film.get("filmName", "").strip()
                 if not raw_name:
                     continue
 
-                # MOVIE NAME
-                movie_name = raw_name.split("(")[0].strip()
+                # MOVIE NAME / LANGUAGE ("SIRAI (TAMIL)")
+                movie_name, language = normalize.pvr_film(raw_name)
 
-                # LANGUAGE
-                language = "UNKNOWN"
-                for lang in self.LANGUAGES:
-                    if f"({lang}" in raw_name or f" {lang} " in raw_name:
-                        language = lang
-                        break
+                cities = self.films.setdefault((movie_name, language), [])
+                if city not in cities:
+                    cities.append(city)
 
-                key = (movie_name, language)
-                if key in seen:
-                    continue
-                seen.add(key)
+        yield from self.city_done(city)
+
+    def pvr_failed(self, failure):
+        city = failure.request.cb_kwargs["city"]
+        self.logger.error("PVR now-showing request failed for %s: %r", city, failure.value)
+        yield from self.city_done(city)
+
+    def city_done(self, city):
+        self.pending_cities.discard(city)
+
+        # Wikipedia lookups start once every city has reported, so each
+        # film is resolved once and carries the full list of cities.
+        if self.pending_cities:
+            return
+
+        # Cities in CITIES order rather than response arrival order, so the
+        # same listings give the same item (ChangeDetectionPipeline)
+        rank = {c: i for i, c in enumerate(self.cities)}
+        yield from self.resolve_films([
+            (movie_name.title(), language.title(), sorted(cities, key=lambda c: rank.get(c, len(rank))))
+            for (movie_name, language), cities in self.films.items()
+        ])
+
+    def resolve_films(self, films):
+        # Every film is registered before anything is yielded, so a
+        # checkpoint taken halfway still lists the rest
+        for movie_name, language, cities in films:
+            self.lookups[(movie_name, language)] = {"cities": cities, "queries": None, "query_index": 0}
+
+        batch = []
+        for movie_name, language, cities in films:
+            # Films resolved (or known to be missing) on earlier runs skip the network
+            entry = self.title_index.get(movie_name, language)
+            if entry is None:
+                batch.append((movie_name, language, cities))
+                continue
+
+            self.crawler.stats.inc_value("title_index/hit")
+            yield self.build_item(movie_name, language, cities, entry["url"] if entry["title"] else None)
+            self.lookups.pop((movie_name, language), None)
 
-                yield self.request_wiki(movie_name.title(), language.title())
+        yield from self.request_wiki_batches(batch)
+
+    def resume_lookups(self):
+        films = []
+        for (movie_name, language), lookup in list(self.lookups.items()):
+            if lookup["queries"] is None:
+                films.append((movie_name, language, lookup["cities"]))
+            else:
+                self.crawler.stats.inc_value("checkpoint/resumed_search")
+                yield self.request_wiki_search(movie_name, language)
+        if films:
+            self.crawler.stats.inc_value("checkpoint/resumed_film", len(films))
+            yield from self.resolve_films(films)
+
+    def build_item(self, movie_name, language, cities, wiki_url):
+        return NowShowingItem(
+            movie_name=movie_name,
+            language=language,
+            wikipedia=wiki_url or "Not Found",
+            cities=cities
+        )
+
+    def remember(self, movie_name, language, page):
+        url = wikipedia.page_url(page["title"])
+        self.title_index.put(
+            movie_name, language, "", page["title"], url,
+            pageid=page.get("pageid"), revid=page.get("lastrevid")
+        )
+        return url
+
+    # =========================
+    # WIKI BATCH TITLE LOOKUP
+    # =========================
+    def request_wiki_batches(self, films):
+        batch_size = min(self.settings.getint("WIKI_BATCH_SIZE", wikipedia.MAX_TITLES), wikipedia.MAX_TITLES)
+
+        batch, titles = [], []
+        for film in films:
+            candidates = wikipedia.candidate_titles(film[0])
+
+            if batch and len(titles) + len(candidates) > batch_size:
+                yield self.request_wiki_batch(batch, titles)
+                batch, titles = [], []
+
+            batch.append((film, candidates))
+            titles.extend(candidates)
+
+        if batch:
+            yield self.request_wiki_batch(batch, titles)
+
+    def request_wiki_batch(self, batch, titles):
+        return scrapy.Request(
+            url=wikipedia.api_url(wikipedia.titles_params(titles)),
+            headers=self.WIKI_HEADERS,
+            callback=self.parse_wiki_batch,
+            errback=self.wiki_batch_failed,
+            dont_filter=True,
+            cb_kwargs={"batch": batch}
+        )
+
+    def parse_wiki_batch(self, response, batch):
+        lookup = wikipedia.resolve_pages(json.loads(response.text))
+
+        for (movie_name, language, cities), candidates in batch:
+            page = wikipedia.pick_film_page([lookup(t) for t in candidates], language)
+
+            if page is None:
+                # Only films without a direct article hit go to full-text search
+                self.crawler.stats.inc_value("wiki/batch_miss")
+                yield self.request_wiki(movie_name, language, cities)
+                continue
+
+            self.crawler.stats.inc_value("wiki/batch_hit")
+            yield self.build_item(movie_name, language, cities, self.remember(movie_name, language, page))
+            self.lookups.pop((movie_name, language), None)
+
+    def wiki_batch_failed(self, failure):
+        self.logger.warning("Wikipedia title batch failed: %r", failure.value)
+
+        for (movie_name, language, cities), _ in failure.request.cb_kwargs["batch"]:
+            yield self.request_wiki(movie_name, language, cities)
 
     # =========================
     # WIKI SEARCH REQUEST
     # =========================
-    def request_wiki(self, movie_name, language):
+    def request_wiki(self, movie_name, language, cities):
         queries = []
 
         if language.lower() != "unknown":
@@ -101,76 +288,52 @@ class PvrNowShowingWikiSpider(scrapy.Spider):
         queries.append(f"{movie_name} film")
         queries.append(movie_name)
 
+        self.lookups[(movie_name, language)] = {"cities": cities, "queries": queries, "query_index": 0}
+        return self.request_wiki_search(movie_name, language)
+
+    def request_wiki_search(self, movie_name, language):
+        # Next query of the film's fallback chain (self.lookups)
+        lookup = self.lookups[(movie_name, language)]
         return scrapy.Request(
-            url="https://en.wikipedia.org/w/api.php",
+            url=wikipedia.api_url(self.build_params(lookup["queries"][lookup["query_index"]])),
             headers=self.WIKI_HEADERS,
             callback=self.parse_wiki,
             dont_filter=True,
             meta={
                 "movie_name": movie_name,
                 "language": language,
-                "queries": queries,
-                "query_index": 0
-            },
-            cb_kwargs={"params": self.build_params(queries[0])}
+            }
         )
 
     def build_params(self, query):
-        return {
-            "action": "query",
-            "list": "search",
-            "srsearch": query,
-            "format": "json",
-            "utf8": 1,
-            "srlimit": 1
-        }
+        return wikipedia.search_params(query)
 
     # =========================
     # PARSE WIKI RESPONSE
     # =========================
-    def parse_wiki(self, response, params):
+    def parse_wiki(self, response):
         data = json.loads(response.text)
 
         movie_name = response.meta["movie_name"]
         language = response.meta["language"]
-        queries = response.meta["queries"]
-        index = response.meta["query_index"]
+        lookup = self.lookups.get((movie_name, language))
+        if lookup is None:
+            # Already resolved by a duplicate of this search
+            return
+        cities = lookup["cities"]
 
         results = data.get("query", {}).get("search", [])
 
         if results:
-            title = results[0]["title"]
-            wiki_url = (
-                "https://en.wikipedia.org/wiki/"
-                + urllib.parse.quote(title.replace(" ", "_"))
-            )
-
-            yield {
-                "movie_name": movie_name,
-                "language": language,
-                "wikipedia": wiki_url
-            }
+            yield self.build_item(movie_name, language, cities, self.remember(movie_name, language, results[0]))
+            self.lookups.pop((movie_name, language), None)
             return
 
         # TRY NEXT QUERY
-        index += 1
-        if index < len(queries):
-            yield scrapy.Request(
-                url="https://en.wikipedia.org/w/api.php",
-                headers=self.WIKI_HEADERS,
-                callback=self.parse_wiki,
-                dont_filter=True,
-                meta={
-                    "movie_name": movie_name,
-                    "language": language,
-                    "queries": queries,
-                    "query_index": index
-                },
-                cb_kwargs={"params": self.build_params(queries[index])}
-            )
+        lookup["query_index"] += 1
+        if lookup["query_index"] < len(lookup["queries"]):
+            yield self.request_wiki_search(movie_name, language)
         else:
-            yield {
-                "movie_name": movie_name,
-                "language": language,
-                "wikipedia": "Not Found"
-            }
+            self.title_index.put_missing(movie_name, language)
+            yield self.build_item(movie_name, language, cities, None)
+            self.lookups.pop((movie_name, language), None)
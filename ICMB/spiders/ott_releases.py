@@ -1,36 +1,68 @@
 import scrapy
 import json
-import requests
 import urllib.parse
-from lxml import html
 from datetime import date, timedelta
 
+from ICMB import search
+from ICMB.items import OttReleaseItem, export_dict, export_fields, from_export
+from ICMB.store import TTLStore
+
 
 class OttplayLatestSpider(scrapy.Spider):
     name = "ottplay_latest"
-    allowed_domains = ["api2.ottplay.com"]
+    allowed_domains = ["api2.ottplay.com", "duckduckgo.com"]
+
+    SEARCH_TIMEOUT = 15
+
+    search_cache = None
+
+    custom_settings = {
+        "FEED_EXPORT_FIELDS": export_fields(OttReleaseItem),
+    }
+
+    STORAGE_TABLE = "ott_releases"
+    # Only these fields count as a change for publishing
+    CHANGE_FIELDS = ("ott_release_date", "ott_link", "ott_html")
 
     # ======================
-    # AUTO DATE RANGE
+    # NEW-RELEASE API
     # ======================
-    today = date.today()
-    FROM_DATE = today
-    TO_DATE = today + timedelta(days=7)
+    API_URL = "https://api2.ottplay.com/api/v4.7/web/new-release"
+
+    WINDOW_DAYS = 7
+    PAGE_LIMIT = 20
+    PAGE_FANOUT = 4
 
     # ======================
-    # START URL
+    # SPIDER ARGUMENTS
     # ======================
-    start_urls = [
-        (
-            "https://api2.ottplay.com/api/v4.7/web/new-release"
-            f"?limit=20"
-            f"&from_date={FROM_DATE.isoformat()}"
-            f"&to_date={TO_DATE.isoformat()}"
-            f"&content_type=movie"
-            f"&language="
-            f"&provider="
+    def __init__(self, from_date=None, to_date=None, content_type="movie",
+                 language="", provider="", limit=None, page_fanout=None,
+                 *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Resolved per run, so long-lived processes don't reuse a stale window
+        self.from_date = date.fromisoformat(from_date) if from_date else date.today()
+        self.to_date = (
+            date.fromisoformat(to_date) if to_date
+            else self.from_date + timedelta(days=self.WINDOW_DAYS)
         )
-    ]
+        self.content_type = content_type
+        self.language = language
+        self.provider = provider
+        self.limit = int(limit or self.PAGE_LIMIT)
+        self.page_fanout = max(1, int(page_fanout or self.PAGE_FANOUT))
+
+        self.seen = set()
+        self.last_requested_page = 0
+        self.last_page = None
+        self.stop_paging = False
+
+        # Requested pages whose releases have all been handed out, and
+        # releases waiting for their DuckDuckGo lookup (unique key -> item
+        # fields); what a resumed run (ICMB.checkpoint) still has to do
+        self.pages_done = set()
+        self.lookups = {}
 
     # ======================
     # HEADERS
@@ -43,25 +75,12 @@ class OttplayLatestSpider(scrapy.Spider):
         "user-agent": "Mozilla/5.0"
     }
 
-    search_headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+    search_headers = search.SEARCH_HEADERS
 
     # ======================
     # OTT PRIORITY & LOGOS
     # ======================
-    OTT_PRIORITY = [
-        "hotstar.com",
-        "zee5.com",
-        "sonyliv.com",
-        "primevideo.com",
-        "lionsgateplay.com",
-        "aha.video",
-        "tataplaybinge.com",
-        "airtelxstream.in",
-        "sunnxt.com",
-        "netflix.com",
-    ]
+    OTT_PRIORITY = search.OTT_PRIORITY
 
     OTT_LOGO_MAP = {
         "hotstar.com": "https://icmb.in/wp-content/uploads/2026/01/hotstar.webp",
@@ -74,62 +93,235 @@ class OttplayLatestSpider(scrapy.Spider):
         "sunnxt.com": "https://icmb.in/wp-content/uploads/2026/01/sunnxt.jpg"
     }
 
+    # ======================
+    # SETTINGS
+    # ======================
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+
+        # DuckDuckGo lookups get their own download slot so the number of
+        # searches in flight is capped independently of the API requests.
+        slots = dict(settings.getdict("DOWNLOAD_SLOTS"))
+        slots.setdefault("duckduckgo.com", {
+            "concurrency": settings.getint("OTT_LOOKUP_CONCURRENCY", 8),
+            "delay": settings.getfloat("OTT_LOOKUP_DELAY", 0),
+        })
+        settings.set("DOWNLOAD_SLOTS", slots, priority="spider")
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+
+        if crawler.settings.getbool("OTT_CACHE_ENABLED", True):
+            spider.search_cache = TTLStore.from_settings(crawler.settings, "ott_search")
+            spider.cache_ttl = crawler.settings.getint("OTT_CACHE_TTL", 7 * 86400)
+            spider.cache_miss_ttl = crawler.settings.getint("OTT_CACHE_MISS_TTL", 86400)
+
+        return spider
+
+    def closed(self, reason):
+        if self.search_cache is not None:
+            self.search_cache.close()
+
+    def item_key(self, item):
+        return f'{item.ottplay_id}|{item.ott_platform}'
+
+    def entity_ref(self, item):
+        # No year in the feed; the OTTplay id links later spellings of a title
+        return item.title, item.language, "", [f"ottplay:{item.ottplay_id}"]
+
+    # ======================
+    # CHECKPOINTS
+    # ======================
+    def checkpoint_state(self):
+        # The window is part of the job, so a resume days later still reads
+        # the releases of the original window
+        return {
+            "from_date": self.from_date.isoformat(),
+            "to_date": self.to_date.isoformat(),
+            "seen": sorted(self.seen),
+            "last_requested_page": self.last_requested_page,
+            "last_page": self.last_page,
+            "stop_paging": self.stop_paging,
+            "pages_done": sorted(self.pages_done),
+            "lookups": self.lookups,
+        }
+
+    def restore_checkpoint(self, state):
+        self.from_date = date.fromisoformat(state["from_date"])
+        self.to_date = date.fromisoformat(state["to_date"])
+        self.seen = set(state["seen"])
+        self.last_requested_page = state["last_requested_page"]
+        self.last_page = state["last_page"]
+        self.stop_paging = state["stop_paging"]
+        self.pages_done = set(state["pages_done"])
+        self.lookups = state["lookups"]
+
     # ======================
     # REQUEST START
     # ======================
+    async def start(self):
+        # First API page, or a resumed job's pages and lookups; see start_requests()
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
-        for url in self.start_urls:
-            yield scrapy.Request(
-                url=url,
-                headers=self.api_headers,
-                callback=self.parse
-            )
+        if not self.last_requested_page:
+            yield self.request_page(1)
+            return
+
+        # Resumed: pages requested but not parsed, and pending lookups
+        for page in range(1, self.last_requested_page + 1):
+            if page not in self.pages_done:
+                self.crawler.stats.inc_value("checkpoint/resumed_page")
+                yield self.request_page(page)
+
+        for fields in list(self.lookups.values()):
+            self.crawler.stats.inc_value("checkpoint/resumed_lookup")
+            yield self.request_ott_link(from_export(OttReleaseItem, fields))
+
+    def page_url(self, page):
+        params = {
+            "limit": self.limit,
+            "page": page,
+            "from_date": self.from_date.isoformat(),
+            "to_date": self.to_date.isoformat(),
+            "content_type": self.content_type,
+            "language": self.language,
+            "provider": self.provider,
+        }
+        return self.API_URL + "?" + urllib.parse.urlencode(params)
+
+    def request_page(self, page):
+        self.last_requested_page = max(self.last_requested_page, page)
+
+        return scrapy.Request(
+            url=self.page_url(page),
+            headers=self.api_headers,
+            callback=self.parse,
+            cb_kwargs={"page": page}
+        )
+
+    # ======================
+    # PAGINATION
+    # ======================
+    def find_last_page(self, data, page, results):
+        for key in ("total_pages", "totalPages", "last_page"):
+            if data.get(key):
+                return int(data[key])
+
+        for key in ("total", "total_count", "totalCount", "count"):
+            if data.get(key):
+                return -(-int(data[key]) // self.limit)
+
+        for key in ("next_page", "nextPage", "next"):
+            if key in data:
+                return None if data[key] else page
+
+        # No paging metadata: a short page is the last one
+        return page if len(results) < self.limit else None
+
+    def follow_pages(self, data, page, results, in_window):
+        if not results or not in_window:
+            if not self.stop_paging:
+                self.logger.info("Stopping pagination at page %d: no releases in window", page)
+            self.stop_paging = True
+
+        if self.stop_paging:
+            return
+
+        last_page = self.find_last_page(data, page, results)
+        if last_page is not None:
+            self.last_page = last_page if self.last_page is None else min(self.last_page, last_page)
+
+        # The first page opens the fan-out window; every later page that is
+        # still in range keeps it full by scheduling one more page.
+        wanted = self.page_fanout if page == 1 else 1
+
+        for _ in range(wanted):
+            next_page = self.last_requested_page + 1
+            if self.last_page is not None and next_page > self.last_page:
+                return
+            yield self.request_page(next_page)
 
     # ======================
     # DUCKDUCKGO HELPERS
     # ======================
-    def extract_uddg_url(self, link):
-        if "uddg=" not in link:
+    def search_query(self, item):
+        return f'{item.title} {item.language} {item.ott_platform} OTT movie'
+
+    def cache_key(self, item):
+        return " ".join(self.search_query(item).lower().split())
+
+    def cached_lookup(self, item):
+        if self.search_cache is None:
             return None
 
-        parsed = urllib.parse.urlparse(link)
-        qs = urllib.parse.parse_qs(parsed.query)
-        uddg = qs.get("uddg", [None])[0]
+        entry = self.search_cache.get(self.cache_key(item))
+        self.crawler.stats.inc_value("ott_cache/hit" if entry else "ott_cache/miss")
+        return entry
 
-        return urllib.parse.unquote(uddg) if uddg else None
+    def store_lookup(self, item, decoded_links, ott_url):
+        if self.search_cache is None:
+            return
 
-    def get_best_ott_link(self, item):
-        release_date = date.fromisoformat(item["ott_release_date"])
+        # Titles without a usable result are retried sooner than found ones
+        ttl = self.cache_ttl if ott_url else self.cache_miss_ttl
+        self.search_cache.set(
+            self.cache_key(item),
+            {"links": decoded_links, "ott_link": ott_url},
+            ttl=ttl
+        )
+        self.crawler.stats.inc_value("ott_cache/stored")
 
-        # Only today or past releases
-        if release_date > date.today():
-            return None
+    def needs_ott_link(self, item):
+        release_date = date.fromisoformat(item.ott_release_date)
 
-        query = f'{item["title"]} {item["language"]} {item["ott_platform"]} OTT movie'
+        # Only today or past releases
+        return release_date <= date.today()
 
-        r = requests.get(
-            "https://duckduckgo.com/html/",
-            params={"q": query},
+    def request_ott_link(self, item):
+        self.lookups[self.unique_key(item)] = export_dict(item)
+        return scrapy.Request(
+            url=search.search_url(self.search_query(item)),
             headers=self.search_headers,
-            timeout=15
+            callback=self.parse_search,
+            errback=self.search_failed,
+            dont_filter=True,
+            meta={"download_timeout": self.SEARCH_TIMEOUT},
+            cb_kwargs={"item": item}
         )
 
-        tree = html.fromstring(r.text)
-        raw_links = tree.xpath("//a[contains(@class,'result__a')]/@href")
+    def pick_best_ott_link(self, decoded_links):
+        # Priority match, else the top result
+        best = search.pick_link(decoded_links, self.OTT_PRIORITY)
+        if best is None and decoded_links:
+            return decoded_links[0]
+        return best
+
+    def parse_search(self, response, item):
+        decoded_links = search.result_links(response.text)
+
+        ott_url = self.pick_best_ott_link(decoded_links)
+        self.store_lookup(item, decoded_links, ott_url)
 
-        decoded_links = []
-        for link in raw_links:
-            decoded = self.extract_uddg_url(link)
-            if decoded:
-                decoded_links.append(decoded)
+        yield self.finish_item(item, ott_url)
+        self.lookups.pop(self.unique_key(item), None)
 
-        # Priority match
-        for domain in self.OTT_PRIORITY:
-            for url in decoded_links:
-                if domain in url:
-                    return url
+    def search_failed(self, failure):
+        item = failure.request.cb_kwargs["item"]
+        self.logger.warning("OTT link lookup failed for %s: %r", item.title, failure.value)
+        yield self.finish_item(item, None)
+        self.lookups.pop(self.unique_key(item), None)
 
-        return decoded_links[0] if decoded_links else None
+    def unique_key(self, item):
+        return f"{item.ottplay_id}_{item.language}_{item.ott_platform}"
+
+    def finish_item(self, item, ott_url):
+        item.ott_link = ott_url
+        item.ott_html = self.build_ott_html(ott_url)
+        return item
 
     def build_ott_html(self, ott_url):
         if not ott_url:
@@ -149,18 +341,16 @@ class OttplayLatestSpider(scrapy.Spider):
     # ======================
     # PARSER
     # ======================
-    def parse(self, response):
+    def parse(self, response, page=1):
         data = json.loads(response.text)
-        seen = set()
+        results = data.get("result") or []
+        in_window = False
 
-        for movie in data.get("result", []):
+        for movie in results:
             title = movie.get("display_name") or movie.get("name")
             ottplay_id = movie.get("ottplay_id")
             language = movie.get("primary_language", {}).get("logo_text")
 
-            if language in ("English", "E"):
-                continue
-
             for w in movie.get("where_to_watch", []):
                 available_from = w.get("available_from")
                 if not available_from:
@@ -168,26 +358,40 @@ class OttplayLatestSpider(scrapy.Spider):
 
                 release_date = date.fromisoformat(available_from[:10])
 
-                if not (self.FROM_DATE <= release_date <= self.TO_DATE):
+                if not (self.from_date <= release_date <= self.to_date):
+                    continue
+                in_window = True
+
+                if language in ("English", "E"):
                     continue
 
                 provider = w.get("provider", {}).get("name")
                 unique_key = f"{ottplay_id}_{language}_{provider}"
 
-                if unique_key in seen:
+                # Keys are marked seen once the item (or its lookup) is out,
+                # so a checkpoint never lists a release that was not
+                if unique_key in self.seen or unique_key in self.lookups:
                     continue
-                seen.add(unique_key)
 
-                item = {
-                    "title": title,
-                    "language": language,
-                    "ott_platform": provider,
-                    "ott_release_date": release_date.isoformat(),
-                }
+                item = OttReleaseItem(
+                    title=title,
+                    ottplay_id=ottplay_id,
+                    language=language,
+                    ott_platform=provider,
+                    ott_release_date=release_date.isoformat(),
+                )
 
-                ott_url = self.get_best_ott_link(item)
+                if not self.needs_ott_link(item):
+                    yield self.finish_item(item, None)
+                    self.seen.add(unique_key)
+                    continue
 
-                item["ott_link"] = ott_url
-                item["ott_html"] = self.build_ott_html(ott_url)
+                cached = self.cached_lookup(item)
+                if cached is not None:
+                    yield self.finish_item(item, cached["ott_link"])
+                else:
+                    yield self.request_ott_link(item)
+                self.seen.add(unique_key)
 
-                yield item
+        yield from self.follow_pages(data, page, results, in_window)
+        self.pages_done.add(page)
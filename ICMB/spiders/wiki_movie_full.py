@@ -1,21 +1,34 @@
 import scrapy
 import re
-import html
+import asyncio
+import multiprocessing
+import csv
+import sys
 import json
-import time
-from bs4 import BeautifulSoup
-from datetime import datetime
-from urllib.parse import quote_plus
-from pathlib import Path
+import base64
+import hashlib
+from itertools import chain
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
+
+from ICMB import infobox, normalize, wikipedia
+from ICMB.enrichment import Enricher
+from ICMB.items import MovieItem, export_dict, export_fields, from_export
+from ICMB.store import TTLStore
+from ICMB.title_index import TitleIndex
 
 
 class WikiMovieFullSpider(scrapy.Spider):
     name = "wiki_movie_full"
-    allowed_domains = ["wikipedia.org", "google.com", "youtube.com"]
+    allowed_domains = ["wikipedia.org", "duckduckgo.com", "youtube.com"]
 
     # -------------------- CONFIG --------------------
+    # Wikipedia asks bots for a descriptive UA with contact details
     HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:117.0) Gecko/20100101 Firefox/117.0"
+        "User-Agent": "ICMBMovieBot/1.0 (contact: admin@icmb.in)"
     }
 
     REQUEST_TIMEOUT = 12
@@ -44,127 +57,545 @@ class WikiMovieFullSpider(scrapy.Spider):
         "https://en.wikipedia.org/wiki/Sky_Force_(film)",
     ]
 
-    FINAL_COLUMNS = [
-        "Genres","Director","Writer","Producer","Screenplay","Starring",
-        "Cinematography","Edited by","Music by","Production Company",
-        "Release Date","Runtime","Budget","Box Office","OTT Platform",
-        "Censorship Rating","Trailer YouTube Link","Plot","Soundtrack",
-        "OTT Platfrom Link","Movie_name","Other Languages","Original Language",
-        "Actors"," Directors"," Languages"," Genres"," Years"," OTT Platforms",
-        " Musics"," Running in Cinemas"," Upcoming Movies"
-    ]
+    # Feeds keep the published column names and order
+    custom_settings = {
+        "FEED_EXPORT_FIELDS": export_fields(MovieItem),
+    }
+
+    # Table used by the storage pipelines; records are keyed on canonical title
+    STORAGE_TABLE = "movies"
+
+    PAGE_META_RE = re.compile(r'"(wgArticleId|wgRevisionId|wgPageName)":\s*("(?:[^"\\]|\\.)*"|\d+)')
+
+    # -------------------- SETUP --------------------
+    FETCH_MODES = ("html", "api")
+
+    def __init__(self, source=None, from_index=False, incremental=False, fetch="html",
+                 parse_workers=None, enrich=None, stream=False, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # File or "-" for stdin: URL lines, CSV, or a JSON/JSON lines feed
+        # (e.g. pvr_now_showing_wiki output); replaces URLS when given
+        self.source = source
+        self.from_index = str(from_index).lower() in ("1", "true", "yes")
+        self.incremental = str(incremental).lower() in ("1", "true", "yes")
+
+        # html: full rendered article, api: lead section via action=parse
+        if fetch not in self.FETCH_MODES:
+            raise ValueError(f"fetch must be one of {self.FETCH_MODES}, got {fetch!r}")
+        self.fetch = fetch
+
+        # Worker processes for article parsing in html mode (0: parse inline);
+        # defaults to the WIKI_PARSE_WORKERS setting
+        self.parse_workers = parse_workers
+        self.parse_pool = None
+        self.parse_slots = None
+
+        # Trailer / OTT / soundtrack / rating lookups (ICMB.enrichment);
+        # defaults to the WIKI_ENRICH setting
+        self.enrich = enrich
+        self.enricher = None
+
+        # Stay open for URLs passed to feed() until end_feed() (see ICMB.run);
+        # only the source / from_index URLs are crawled from the start
+        self.stream = str(stream).lower() in ("1", "true", "yes")
+        self.feed_closed = not self.stream
+        self.feed_ready = False
+        self.feed_backlog = []
+        self.feed_batches = {}
+
+        # 8-byte digests of the canonical titles queued so far, and of those
+        # fetched (or answered from a snapshot); fed URLs not fetched yet are
+        # kept so checkpoints (ICMB.checkpoint) can hand them to a resumed run
+        self.seen_inputs = set()
+        self.inputs_done = set()
+        self.fed_pending = {}
+        self.resumed_urls = []
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+
+        # Search and video lookups are paced per host by their download
+        # slots instead of sleeping between calls
+        slots = dict(settings.getdict("DOWNLOAD_SLOTS"))
+        slots.setdefault("duckduckgo.com", {
+            "concurrency": settings.getint("OTT_LOOKUP_CONCURRENCY", 4),
+            "delay": cls.SEARCH_SLEEP,
+        })
+        slots.setdefault("www.youtube.com", {"concurrency": 2, "delay": cls.VIDEO_SLEEP})
+        settings.set("DOWNLOAD_SLOTS", slots, priority="spider")
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.title_index = TitleIndex.from_settings(crawler.settings)
+        spider.snapshots = TTLStore.from_settings(crawler.settings, "wiki_snapshots")
+
+        workers = spider.parse_workers
+        spider.parse_workers = int(workers) if workers is not None else crawler.settings.getint("WIKI_PARSE_WORKERS", 0)
+        if spider.parse_workers > 0 and spider.fetch == "html":
+            # spawn: workers must not inherit the reactor, its threads or
+            # the open SQLite handles
+            spider.parse_pool = ProcessPoolExecutor(
+                max_workers=spider.parse_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            # Pages handed to the pool but not parsed yet; keeps pickled
+            # bodies from piling up when downloads outrun the workers
+            spider.parse_slots = asyncio.Semaphore(2 * spider.parse_workers)
+
+        enrich = spider.enrich
+        if enrich is None:
+            enrich = crawler.settings.getbool("WIKI_ENRICH", False)
+        if str(enrich).lower() in ("1", "true", "yes"):
+            spider.enricher = Enricher.from_crawler(crawler)
+
+        if spider.stream:
+            crawler.signals.connect(spider.feed_opened, signal=signals.spider_opened)
+            crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        return spider
+
+    def closed(self, reason):
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(cancel_futures=True)
+        self.title_index.close()
+        self.snapshots.close()
+
+    def item_key(self, item):
+        return wikipedia.canonical_key(item.wikipedia)
+
+    def entity_ref(self, item):
+        # Infobox language and release year break ties between same-named films
+        return item.movie_name, item.original_language, item.years, [f"wiki:{self.item_key(item)}"]
 
     # -------------------- START --------------------
+    def start_urls_to_crawl(self):
+        for url in self.resumed_urls:
+            if self.accept_url(url):
+                self.fed_pending[self.input_key(url)] = url
+                yield url
+        self.resumed_urls = []
+
+        if self.source:
+            urls = self.iter_source_urls()
+        else:
+            urls = iter(() if self.stream else self.URLS)
+        if self.from_index:
+            # Articles found by pvr_now_showing_wiki (and earlier runs)
+            urls = chain(urls, self.title_index.urls())
+
+        for url in urls:
+            if self.accept_url(url):
+                yield url
+
+    def input_key(self, url):
+        # Only an 8-byte digest per canonical title is kept for dedup, so
+        # memory stays flat however long the input stream is
+        return hashlib.blake2b(wikipedia.canonical_key(url).encode(), digest_size=8).digest()
+
+    def accept_url(self, url):
+        key = self.input_key(url)
+        if key in self.inputs_done:
+            self.crawler.stats.inc_value("wiki/input_done")
+            return False
+        if key in self.seen_inputs:
+            self.crawler.stats.inc_value("wiki/input_duplicate")
+            return False
+        self.seen_inputs.add(key)
+        return True
+
+    def input_done(self, url):
+        key = self.input_key(url)
+        self.inputs_done.add(key)
+        self.fed_pending.pop(key, None)
+
+    # -------------------- CHECKPOINTS --------------------
+    def checkpoint_state(self):
+        # Source and index URLs are read again on resume, so only the digests
+        # of finished ones are kept, packed: 8 bytes per article
+        return {
+            "done": base64.b64encode(b"".join(sorted(self.inputs_done))).decode("ascii"),
+            "pending": list(self.fed_pending.values()),
+        }
+
+    def restore_checkpoint(self, state):
+        done = base64.b64decode(state["done"])
+        self.inputs_done = {done[i:i + 8] for i in range(0, len(done), 8)}
+        self.resumed_urls = state["pending"]
+        self.crawler.stats.set_value("checkpoint/inputs_done", len(self.inputs_done))
+
+    def iter_source_urls(self):
+        if self.source == "-":
+            yield from self.parse_source_lines(sys.stdin, csv_input=False)
+            return
+
+        with open(self.source, encoding="utf-8", newline="") as fh:
+            yield from self.parse_source_lines(fh, csv_input=self.source.endswith(".csv"))
+
+    def parse_source_lines(self, lines, csv_input):
+        if csv_input:
+            rows = csv.DictReader(lines)
+        else:
+            rows = (self.parse_source_line(line) for line in lines)
+
+        for row in rows:
+            url = (row.get("wikipedia") or row.get("url")) if isinstance(row, dict) else row
+            url = (url or "").strip()
+
+            if not url.startswith("http"):
+                # "Not Found" rows from pvr_now_showing_wiki, blank lines
+                continue
+            yield url
+
+    def parse_source_line(self, line):
+        # JSON feeds are written one item per line: "[", "{...},", "]"
+        line = line.strip().rstrip(",")
+        if line.startswith("{"):
+            return json.loads(line)
+        return line
+
+    async def start(self):
+        # Article (or revision check) requests; see start_requests()
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
-        for url in self.URLS:
-            yield scrapy.Request(
-                url=url,
-                headers=self.HEADERS,
-                callback=self.parse_movie,
-                dont_filter=True
-            )
+        if self.incremental:
+            yield from self.revision_requests(self.start_urls_to_crawl())
+            return
+
+        for url in self.start_urls_to_crawl():
+            yield self.movie_request(url)
+
+    def movie_request(self, url, refresh=False):
+        # refresh: the article has a newer revision than the response cache
+        # may hold, so it is downloaded (and the cache entry replaced)
+        if self.fetch == "api":
+            return self.movie_api_request(url, refresh)
+
+        return scrapy.Request(
+            url=url,
+            headers=self.HEADERS,
+            callback=self.parse_movie if self.parse_pool is None else self.parse_movie_pooled,
+            dont_filter=True,
+            # Input URL, as redirects change response.url
+            meta={"wiki_input": url, "cache_refresh": refresh}
+        )
+
+    def movie_api_request(self, url, refresh=False):
+        host = urlparse(url).hostname
+        return scrapy.Request(
+            url=wikipedia.api_url(
+                wikipedia.lead_params(wikipedia.title_from_url(url)),
+                api=wikipedia.api_for_host(host)
+            ),
+            headers=self.HEADERS,
+            callback=self.parse_movie_api,
+            dont_filter=True,
+            meta={"wiki_input": url, "cache_refresh": refresh},
+            cb_kwargs={"host": host}
+        )
+
+    # -------------------- STREAMED INPUT --------------------
+    def feed(self, url):
+        if self.feed_closed or not self.accept_url(url):
+            return
+        self.crawler.stats.inc_value("wiki/fed")
+        self.fed_pending[self.input_key(url)] = url
+
+        if not self.incremental:
+            self.schedule(self.movie_request(url))
+            return
+
+        # Revision checks still go out 50 titles per query; partial batches
+        # are sent whenever the spider runs out of work
+        host = urlparse(url).hostname
+        batch = self.feed_batches.setdefault(host, [])
+        batch.append((url, wikipedia.title_from_url(url)))
+        if len(batch) == wikipedia.MAX_TITLES:
+            self.schedule(self.revision_request(host, self.feed_batches.pop(host)))
+
+    def end_feed(self):
+        if self.feed_closed:
+            return
+        self.feed_closed = True
+
+        if self.feed_ready and not self.flush_feed():
+            engine = self.crawler.engine
+            if engine.spider_is_idle():
+                # Idle checks run every few seconds; no point waiting for one.
+                # Scrapy >= 2.14; close_spider() serves older versions
+                if hasattr(engine, "close_spider_async"):
+                    asyncio.ensure_future(engine.close_spider_async(reason="finished"))
+                else:
+                    engine.close_spider(self, "finished")
+
+    def schedule(self, request):
+        if self.feed_ready:
+            self.crawler.engine.crawl(request)
+        else:
+            self.feed_backlog.append(request)
+
+    def flush_feed(self):
+        requests = self.feed_backlog
+        self.feed_backlog = []
+        for host, batch in self.feed_batches.items():
+            requests.append(self.revision_request(host, batch))
+        self.feed_batches = {}
+
+        for request in requests:
+            self.crawler.engine.crawl(request)
+        return bool(requests)
+
+    def feed_opened(self, spider):
+        # URLs fed before the engine could take requests
+        self.feed_ready = True
+        self.flush_feed()
+
+    def spider_idle(self, spider):
+        if self.flush_feed() or not self.feed_closed:
+            raise DontCloseSpider
+
+    # -------------------- INCREMENTAL --------------------
+    def snapshot_key(self, host, title):
+        return f"{host}:{title}"
+
+    def revision_requests(self, urls):
+        # One prop=info query per wiki host and 50 titles
+        pending = {}
+        for url in urls:
+            host = urlparse(url).hostname
+            batch = pending.setdefault(host, [])
+            batch.append((url, wikipedia.title_from_url(url)))
+
+            if len(batch) == wikipedia.MAX_TITLES:
+                yield self.revision_request(host, pending.pop(host))
+
+        for host, batch in pending.items():
+            yield self.revision_request(host, batch)
+
+    def revision_request(self, host, batch):
+        return scrapy.Request(
+            url=wikipedia.api_url(
+                wikipedia.revisions_params([title for _, title in batch]),
+                api=wikipedia.api_for_host(host)
+            ),
+            headers=self.HEADERS,
+            callback=self.parse_revisions,
+            errback=self.revisions_failed,
+            dont_filter=True,
+            cb_kwargs={"host": host, "batch": batch}
+        )
+
+    def parse_revisions(self, response, host, batch):
+        lookup = wikipedia.resolve_pages(json.loads(response.text))
+
+        for url, title in batch:
+            page = lookup(title)
+            snapshot = None
+            if page is not None:
+                snapshot = self.snapshots.get(self.snapshot_key(host, page["title"]))
+
+            if snapshot and snapshot["revid"] == page.get("lastrevid"):
+                self.crawler.stats.inc_value("wiki/revision_unchanged")
+                record = from_export(MovieItem, snapshot["record"])
+                record.wikipedia = record.wikipedia or wikipedia.page_url(page["title"], host)
+                yield record
+                self.input_done(url)
+            else:
+                self.crawler.stats.inc_value("wiki/revision_changed")
+                yield self.movie_request(url, refresh=True)
+
+    def revisions_failed(self, failure):
+        self.logger.warning("Revision check failed, fetching pages: %r", failure.value)
+        for url, _ in failure.request.cb_kwargs["batch"]:
+            yield self.movie_request(url)
 
     # -------------------- PARSE MOVIE --------------------
-    def parse_movie(self, response):
-        soup = BeautifulSoup(response.text, "lxml")
-        out = {c: "" for c in self.FINAL_COLUMNS}
+    async def parse_movie(self, response):
+        doc = infobox.parse_html(response.text)
+        box = infobox.Infobox(doc)
+        out = self.extract_record(doc, box, response.url)
+        out.wikipedia = response.url
+
+        yield await self.finish_movie(response.url, self.page_meta(response), out)
+        self.input_done(response.meta.get("wiki_input", response.url))
+
+    async def parse_movie_pooled(self, response):
+        # Same as parse_movie, with the parsing done by parse_article() in
+        # a worker process; each page is yielded as soon as it is parsed
+        async with self.parse_slots:
+            future = self.parse_pool.submit(parse_article, response.body, response.encoding, response.url)
+            try:
+                parsed = await asyncio.wrap_future(future)
+            except Exception as e:
+                self.logger.error("Parsing %s in a worker failed: %r", response.url, e)
+                self.crawler.stats.inc_value("wiki/parse_worker_error")
+                return
+
+        self.crawler.stats.inc_value("wiki/parsed_in_worker")
+        out = from_export(MovieItem, parsed["record"])
+        yield await self.finish_movie(response.url, parsed["page_meta"], out)
+        self.input_done(response.meta.get("wiki_input", response.url))
 
-        # Movie name
-        title_tag = soup.select_one("#firstHeading")
-        raw_title = title_tag.get_text(strip=True) if title_tag else response.url.split("/")[-1]
-        out["Movie_name"] = self.clean_movie_title(raw_title)
+    async def finish_movie(self, url, page_meta, out):
+        # Enriched before the snapshot is written, so unchanged revisions
+        # replay the looked-up columns too
+        if self.enricher is not None:
+            await self.enricher.enrich(out, out.original_language)
+
+        self.remember(url, page_meta, out.original_language, out)
+        self.store_snapshot(url, page_meta, out)
+        return out
+
+    async def parse_movie_api(self, response, host):
+        data = json.loads(response.text)
+
+        if "error" in data:
+            self.logger.warning("Wikipedia parse API error for %s: %s", response.url, data["error"].get("info"))
+            self.crawler.stats.inc_value("wiki/parse_api_error")
+            self.input_done(response.meta["wiki_input"])
+            return
+
+        parsed = data["parse"]
+        doc = infobox.parse_html(parsed["text"])
+        box = infobox.Infobox(doc)
+        url = wikipedia.page_url(parsed["title"], host)
+        out = self.extract_record(doc, box, url, raw_title=parsed["title"])
+        out.wikipedia = url
+
+        page_meta = {"title": parsed["title"], "pageid": parsed.get("pageid"), "revid": parsed.get("revid")}
+        yield await self.finish_movie(url, page_meta, out)
+        self.input_done(response.meta["wiki_input"])
+
+    # Class-level so parse_article() can run it in a worker without a spider
+    @classmethod
+    def extract_record(cls, doc, box, url, raw_title=None):
+        out = MovieItem()
+
+        # Movie name (the lead-section payload has no page heading)
+        if raw_title is None:
+            title_tag = infobox.first(doc, infobox.FIRST_HEADING)
+            raw_title = infobox.get_text(title_tag, strip=True) if title_tag is not None else url.split("/")[-1]
+        out.movie_name = normalize.movie_title(raw_title)
+
+        # Language (first of the infobox row; also breaks entity ties)
+        out.original_language = cls.infobox_language(box)
 
         # Poster
-        img = soup.select_one('table.infobox a.image img')
-        if img and img.get("src"):
-            src = img["src"]
-            out["poster"] = ("https:" + src) if src.startswith("//") else src
+        img = infobox.first(doc, infobox.INFOBOX_IMAGE)
+        if img is not None and img.get("src"):
+            src = img.get("src")
+            out.poster = ("https:" + src) if src.startswith("//") else src
 
         # Genres
-        genres = self.extract_anchor_texts_from_td(self.first_infobox_td(soup, "Genre"))
-        out[" Genres"] = ", ".join(genres)
+        genres = cls.extract_anchor_texts_from_td(cls.first_infobox_td(box, "Genre"))
+        out.tax_genres = ", ".join(genres)
 
         # Director
-        dirs = self.extract_anchor_texts_from_td(self.first_infobox_td(soup, "Director"))
-        out[" Directors"] = ", ".join(dirs)
+        dirs = cls.extract_anchor_texts_from_td(cls.first_infobox_td(box, "Director"))
+        out.tax_directors = ", ".join(dirs)
 
         # Writer / Producer
-        out["Writer"] = ", ".join(self.extract_anchor_texts_from_td(self.first_infobox_td(soup, "Writer")))
-        out["Producer"] = ", ".join(self.extract_anchor_texts_from_td(self.first_infobox_td(soup, "Producer")))
+        out.writer = ", ".join(cls.extract_anchor_texts_from_td(cls.first_infobox_td(box, "Writer")))
+        out.producer = ", ".join(cls.extract_anchor_texts_from_td(cls.first_infobox_td(box, "Producer")))
 
         # Actors
-        starring = self.extract_anchor_texts_from_td(self.first_infobox_td(soup, "Starring"))
-        out["Actors"] = ", ".join(starring)
+        starring = cls.extract_anchor_texts_from_td(cls.first_infobox_td(box, "Starring"))
+        out.actors = ", ".join(starring)
 
         # Release date
-        raw_release = self.extract_text_from_td(self.first_infobox_td(soup, "Release"))
-        out["Release Date"] = self.format_release_date(raw_release)
-        m_year = re.search(r"\b(19|20)\d{2}\b", raw_release or "")
-        out["Years"] = m_year.group(0) if m_year else ""
+        raw_release = cls.extract_text_from_td(cls.first_infobox_td(box, "Release"))
+        out.release_date = normalize.release_date(raw_release)
+        out.years = normalize.release_year(raw_release)
 
         # Runtime
-        out["Runtime"] = self.normalize_runtime(
-            self.extract_text_from_td(self.first_infobox_td(soup, "Running time"))
-        )
+        out.runtime = normalize.runtime(cls.extract_text_from_td(cls.first_infobox_td(box, "Running time")))
 
         # Budget / Box office
-        out["Budget"] = self.extract_text_from_td(self.first_infobox_td(soup, "Budget"))
-        out["Box Office"] = self.extract_text_from_td(self.first_infobox_td(soup, "Box office"))
+        out.budget = cls.extract_text_from_td(cls.first_infobox_td(box, "Budget"))
+        out.box_office = cls.extract_text_from_td(cls.first_infobox_td(box, "Box office"))
 
         # Plot
-        paras = soup.select("div.mw-parser-output > p")
+        paras = doc.xpath(infobox.LEAD_PARAGRAPHS)
         for p in paras:
-            text = p.get_text(" ", strip=True)
+            text = infobox.get_text(p, " ", strip=True)
             if len(text) > 80:
-                out["Plot"] = re.sub(r'\[\d+\]', '', text)
+                out.plot = normalize.strip_citations(text)
                 break
 
-        yield out
+        return out
+
+    # -------------------- TITLE INDEX / SNAPSHOTS --------------------
+    def page_meta(self, response):
+        return self.page_meta_from_text(response.text, response.url)
+
+    @classmethod
+    def page_meta_from_text(cls, text, url):
+        config = {}
+        for key, value in cls.PAGE_META_RE.findall(text):
+            config.setdefault(key, json.loads(value))
 
-    # -------------------- HELPERS (UNCHANGED LOGIC) --------------------
-    def first_infobox_td(self, soup, label):
-        for tr in soup.select("table.infobox tr"):
-            th = tr.find("th")
-            if th and label.lower() in th.get_text(strip=True).lower():
-                return tr.find("td")
-        return None
+        title = config.get("wgPageName") or wikipedia.title_from_url(url)
+        return {
+            "title": title.replace("_", " "),
+            "pageid": config.get("wgArticleId"),
+            "revid": config.get("wgRevisionId"),
+        }
 
-    def extract_anchor_texts_from_td(self, td):
+    def store_snapshot(self, url, page_meta, out):
+        if not page_meta["revid"]:
+            return
+
+        self.snapshots.set(
+            self.snapshot_key(urlparse(url).hostname, page_meta["title"]),
+            {"revid": page_meta["revid"], "record": export_dict(out)}
+        )
+
+    @classmethod
+    def infobox_language(cls, box):
+        languages = cls.extract_anchor_texts_from_td(cls.first_infobox_td(box, "Language"))
+        if not languages:
+            languages = cls.extract_text_from_td(cls.first_infobox_td(box, "Language")).split(",")
+        return languages[0].strip() if languages else ""
+
+    def remember(self, url, page_meta, language, out):
+        title = page_meta["title"]
+        movie_name = out.movie_name.split("(")[0].strip()
+        self.title_index.put(
+            movie_name, language, out.years, title, url,
+            pageid=page_meta["pageid"], revid=page_meta["revid"]
+        )
+
+    # -------------------- INFOBOX CELLS --------------------
+    @staticmethod
+    def first_infobox_td(box, label):
+        return box.cell(label)
+
+    @staticmethod
+    def extract_anchor_texts_from_td(td):
         if td is None:
             return []
-        anchors = [a.get_text(strip=True) for a in td.find_all("a")]
+        anchors = [infobox.get_text(a, strip=True) for a in td.iter("a")]
         return [a for a in anchors if a]
 
-    def extract_text_from_td(self, td):
+    @staticmethod
+    def extract_text_from_td(td):
         if td is None:
             return ""
-        return re.sub(r'\s+', ' ', td.get_text(" ", strip=True)).strip()
+        return re.sub(r'\s+', ' ', infobox.get_text(td, " ", strip=True)).strip()
 
-    def clean_movie_title(self, title):
-        title = title.replace("_", " ")
-        year_match = re.search(r"\b(19|20)\d{2}\b", title)
-        year = year_match.group(0) if year_match else ""
-        name = title.split("(")[0].strip()
-        return f"{name} ({year})" if year else name
 
-    def format_release_date(self, raw):
-        if not raw:
-            return ""
-        cleaned = re.sub(r"\(.*?\)", "", raw).strip()
-        for fmt in ("%d %B %Y", "%d %b %Y"):
-            try:
-                return datetime.strptime(cleaned, fmt).strftime("%d-%b-%Y")
-            except Exception:
-                pass
-        return cleaned
+# Worker-process entry point for parse_pool: raw page bytes in, plain dicts
+# out (items and lxml trees are not worth pickling back)
+def parse_article(body, encoding, url):
+    text = body.decode(encoding or "utf-8", errors="replace")
+    doc = infobox.parse_html(text)
+    box = infobox.Infobox(doc)
+    out = WikiMovieFullSpider.extract_record(doc, box, url)
+    out.wikipedia = url
 
-    def normalize_runtime(self, raw):
-        if not raw:
-            return ""
-        m = re.search(r"(\d+)\s*min", raw.lower())
-        if m:
-            return f"{m.group(1)} min"
-        m = re.search(r"(\d+)\s*h", raw.lower())
-        if m:
-            return f"{int(m.group(1))*60} min"
-        return raw
+    return {
+        "record": export_dict(out),
+        "page_meta": WikiMovieFullSpider.page_meta_from_text(text, url),
+    }
@@ -0,0 +1,54 @@
+# Storage backends for ICMB.pipelines.StoragePipeline.
+#
+# A backend receives batches of (key, item dict) rows for a table and
+# upserts them on the key in a single transaction. Select one with the
+# STORAGE_BACKEND setting; any class with the same from_settings /
+# write_batch / close methods can be plugged in.
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+
+class SqliteBackend:
+    def __init__(self, path):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.tables = set()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get("STORAGE_SQLITE_PATH", ".icmb/items.sqlite"))
+
+    def ensure_table(self, table):
+        if table in self.tables:
+            return
+
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " updated_at REAL NOT NULL"
+            ")"
+        )
+        self.tables.add(table)
+
+    def write_batch(self, table, rows):
+        self.ensure_table(table)
+        now = time.time()
+
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO {table} (key, data, first_seen, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                [(key, json.dumps(data, ensure_ascii=False), now, now) for key, data in rows]
+            )
+
+    def close(self):
+        self.conn.close()
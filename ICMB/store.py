@@ -0,0 +1,114 @@
+# Small persistent key/value store shared by the spiders and pipelines.
+#
+# Values are JSON encoded and every entry carries its own expiry time, so
+# the same table can hold long-lived results next to short-lived misses.
+# ttl=None never expires; a ttl of 0 or less stores nothing (and drops any
+# entry already under the key), so a TTL setting of 0 turns caching off.
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+
+class TTLStore:
+    def __init__(self, path, table="kv"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = path
+        self.table = table
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL"
+            ")"
+        )
+
+    @classmethod
+    def from_settings(cls, settings, table):
+        return cls(settings.get("ICMB_STATE_DB", ".icmb/state.sqlite"), table)
+
+    def get(self, key, default=None):
+        row = self.conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return default
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return default
+
+        return json.loads(value)
+
+    def __contains__(self, key):
+        marker = object()
+        return self.get(key, marker) is not marker
+
+    def set(self, key, value, ttl=None):
+        if ttl is not None and ttl <= 0:
+            self.delete(key)
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        self.conn.execute(
+            f"INSERT INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value, ensure_ascii=False), expires_at)
+        )
+
+    def set_many(self, pairs, ttl=None):
+        # One transaction for the whole batch
+        expires_at = time.time() + ttl if ttl is not None else None
+        self.conn.execute("BEGIN")
+        try:
+            if ttl is not None and ttl <= 0:
+                self.conn.executemany(
+                    f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key, _ in pairs]
+                )
+            else:
+                self.conn.executemany(
+                    f"INSERT INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                    [(key, json.dumps(value, ensure_ascii=False), expires_at) for key, value in pairs]
+                )
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def items(self, page_size=500):
+        # Paged by key so callers may write to the table while iterating
+        last_key = ""
+        while True:
+            rows = self.conn.execute(
+                f"SELECT key, value FROM {self.table} "
+                "WHERE key > ? AND (expires_at IS NULL OR expires_at > ?) "
+                "ORDER BY key LIMIT ?",
+                (last_key, time.time(), page_size)
+            ).fetchall()
+
+            for key, value in rows:
+                yield key, json.loads(value)
+
+            if len(rows) < page_size:
+                return
+            last_key = rows[-1][0]
+
+    def delete(self, key):
+        self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        cur = self.conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),)
+        )
+        return cur.rowcount
+
+    def close(self):
+        self.conn.close()
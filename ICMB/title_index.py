@@ -0,0 +1,63 @@
+# Persistent index from (movie_name, language, year) to the Wikipedia article
+# that covers the film, shared by pvr_now_showing_wiki and wiki_movie_full.
+#
+# Films without an article yet are stored as negative entries that expire,
+# so they are searched again after TITLE_INDEX_NEGATIVE_TTL.
+
+import re
+
+from ICMB.store import TTLStore
+
+NON_WORD = re.compile(r"[\W_]+")
+
+
+class TitleIndex:
+    def __init__(self, store, ttl=None, negative_ttl=3 * 86400):
+        self.store = store
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            TTLStore.from_settings(settings, "title_index"),
+            ttl=settings.getint("TITLE_INDEX_TTL", 0) or None,
+            negative_ttl=settings.getint("TITLE_INDEX_NEGATIVE_TTL", 3 * 86400),
+        )
+
+    @staticmethod
+    def key(movie_name, language="", year=""):
+        name = NON_WORD.sub(" ", movie_name.casefold()).strip()
+        language = (language or "").casefold().strip()
+        if language == "unknown":
+            language = ""
+        return f"{name}|{language}|{year or ''}"
+
+    def get(self, movie_name, language="", year=""):
+        return self.store.get(self.key(movie_name, language, year))
+
+    def put(self, movie_name, language, year, title, url, pageid=None, revid=None):
+        entry = {"title": title, "url": url, "pageid": pageid, "revid": revid}
+        self.store.set(self.key(movie_name, language, year), entry, ttl=self.ttl)
+
+        # PVR listings carry no year, so also answer year-less lookups
+        if year:
+            self.store.set(self.key(movie_name, language), entry, ttl=self.ttl)
+
+    def put_missing(self, movie_name, language="", year=""):
+        self.store.set(
+            self.key(movie_name, language, year),
+            {"title": None},
+            ttl=self.negative_ttl
+        )
+
+    def urls(self):
+        seen = set()
+        for _, entry in self.store.items():
+            url = entry.get("url")
+            if url and url not in seen:
+                seen.add(url)
+                yield url
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,139 @@
+# Helpers for talking to the MediaWiki action API.
+
+import urllib.parse
+from datetime import date
+
+WIKI_HOST = "en.wikipedia.org"
+WIKI_API = f"https://{WIKI_HOST}/w/api.php"
+
+# The API accepts at most 50 titles per query for normal clients
+MAX_TITLES = 50
+
+
+def api_url(params, api=WIKI_API):
+    return api + "?" + urllib.parse.urlencode(params)
+
+
+def api_for_host(host):
+    return f"https://{host}/w/api.php"
+
+
+def title_from_url(url):
+    path = urllib.parse.urlparse(url).path
+    return urllib.parse.unquote(path.split("/wiki/", 1)[-1]).replace("_", " ")
+
+
+def page_url(title, host=WIKI_HOST):
+    return f"https://{host}/wiki/" + urllib.parse.quote(title.replace(" ", "_"))
+
+
+def canonical_key(url):
+    # Titles are case-sensitive except for their first letter
+    title = title_from_url(url).strip()
+    host = urllib.parse.urlparse(url).hostname
+    return f"{host}:{title[:1].upper()}{title[1:]}"
+
+
+def search_params(query):
+    return {
+        "action": "query",
+        "list": "search",
+        "srsearch": query,
+        "format": "json",
+        "utf8": 1,
+        "srlimit": 1
+    }
+
+
+def titles_params(titles):
+    return {
+        "action": "query",
+        "titles": "|".join(titles),
+        "redirects": 1,
+        "prop": "description|pageprops|info",
+        "ppprop": "disambiguation",
+        "format": "json",
+        "formatversion": 2,
+        "utf8": 1
+    }
+
+
+def revisions_params(titles):
+    return {
+        "action": "query",
+        "titles": "|".join(titles),
+        "redirects": 1,
+        "prop": "info",
+        "format": "json",
+        "formatversion": 2,
+        "utf8": 1
+    }
+
+
+def lead_params(title):
+    # Only the lead section: infobox plus introduction, no navboxes or references
+    return {
+        "action": "parse",
+        "page": title,
+        "prop": "text",
+        "section": 0,
+        "redirects": 1,
+        "disableeditsection": 1,
+        "disablelimitreport": 1,
+        "disabletoc": 1,
+        "format": "json",
+        "formatversion": 2,
+        "utf8": 1
+    }
+
+
+def candidate_titles(movie_name, today=None):
+    # Article titles Wikipedia typically uses for a film currently in cinemas
+    year = (today or date.today()).year
+    return [
+        f"{movie_name} ({year} film)",
+        f"{movie_name} ({year - 1} film)",
+        f"{movie_name} (film)",
+        movie_name,
+    ]
+
+
+# Map every requested title of a titles= query to its page (or None),
+# following the normalization and redirect tables of the response.
+def resolve_pages(data):
+    query = data.get("query", {})
+
+    normalized = {n["from"]: n["to"] for n in query.get("normalized", [])}
+    redirects = {r["from"]: r["to"] for r in query.get("redirects", [])}
+
+    pages = {}
+    for page in query.get("pages", []):
+        if page.get("missing") or page.get("invalid"):
+            continue
+        pages[page["title"]] = page
+
+    def lookup(title):
+        title = normalized.get(title, title)
+        title = redirects.get(title, title)
+        return pages.get(title)
+
+    return lookup
+
+
+def is_film_page(page):
+    if page is None or "disambiguation" in page.get("pageprops", {}):
+        return False
+    return "film" in page.get("description", "").lower()
+
+
+# First film article among the candidates, preferring one whose short
+# description mentions the film's language.
+def pick_film_page(pages, language=None):
+    films = [p for p in pages if is_film_page(p)]
+
+    if language and language.lower() != "unknown":
+        for page in films:
+            if language.lower() in page.get("description", "").lower():
+                return page
+
+    return films[0] if films else None
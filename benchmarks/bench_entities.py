@@ -0,0 +1,149 @@
+# Times ICMB.entities.EntityIndex lookups at catalogue sizes of tens of
+# thousands of films, against a linear scan over every film. The catalogue
+# is generated (seeded) film names with years and languages; lookups are
+#   exact  - the PVR spelling of a known film ("KGF CHAPTER 2 (KANNADA) 3D")
+#   fuzzy  - a known name with one letter doubled or dropped
+#   miss   - names not in the catalogue
+# and the matched film is checked against the one the lookup was made from.
+# Build time and the time to reload the index from SQLite are reported too.
+#
+#     python -m benchmarks.bench_entities
+#     python -m benchmarks.bench_entities --films 10000 50000 --queries 2000
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ICMB.entities import EntityIndex, name_key, trigrams
+from ICMB.store import TTLStore
+
+# Consonant-vowel syllables plus a few words common in titles, so that
+# some trigrams ("the", "lov") are shared by many films
+SYLLABLES = [c + v for c in "bcdghjklmnprstvy" for v in "aeiou"] + ["tha", "sha", "ndr", "kka", "pp", "nth"]
+COMMON_WORDS = ["The", "Love", "Story", "King", "Return", "Chapter", "Part", "Raja", "Mr", "Da"]
+LANGUAGES = ["Tamil", "Telugu", "Hindi", "Kannada", "Malayalam", "English", "Bengali", "Marathi"]
+
+
+def film_names(count, rng):
+    # Unique names of one to four generated words, some with sequel numbers
+    names = set()
+    while len(names) < count:
+        words = [
+            rng.choice(COMMON_WORDS) if rng.random() < 0.15
+            else "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))).capitalize()
+            for _ in range(rng.randint(1, 4))
+        ]
+        if rng.random() < 0.05:
+            words.append(str(rng.randint(2, 4)))
+        names.add(" ".join(words))
+    return sorted(names)
+
+
+def catalogue(count, seed=1):
+    rng = random.Random(seed)
+    films = []
+    seen_keys = set()
+    for name in film_names(count * 2, rng):
+        key = name_key(name)
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        films.append((name, rng.choice(LANGUAGES), str(rng.randint(1960, 2026))))
+        if len(films) == count:
+            break
+    return films
+
+
+def typo(name, rng):
+    # One letter doubled or dropped, away from the first letter and digits
+    positions = [i for i, c in enumerate(name) if i and c.isalpha()]
+    i = rng.choice(positions)
+    return name[:i] + name[i] + name[i:] if rng.random() < 0.5 else name[:i] + name[i + 1:]
+
+
+def queries(films, count, seed=2):
+    rng = random.Random(seed)
+    # Fuzzy lookups need names long enough for one typo to stay above the
+    # threshold; short names only ever match exactly
+    long_names = [i for i, (name, _, _) in enumerate(films) if len(name_key(name)) >= 12]
+    exact, fuzzy = [], []
+    for i in rng.sample(range(len(films)), count):
+        name, language, year = films[i]
+        exact.append((i, f"{name.upper()} ({language.upper()}) 3D", language, ""))
+    for i in rng.sample(long_names, count):
+        name, language, _ = films[i]
+        fuzzy.append((i, typo(name, rng), language, ""))
+    misses = [(None, name, "", "") for name, _, _ in catalogue(count, seed=seed + 100)]
+    return {"exact": exact, "fuzzy": fuzzy, "miss": misses}
+
+
+def linear_match(index, name, threshold):
+    # What an index-free join does per record: score every film
+    query = trigrams(name_key(name))
+    best, best_score = None, threshold
+    for film_id, grams in index.film_grams.items():
+        score = 2 * len(query & grams) / (len(query) + len(grams))
+        if score >= best_score:
+            best, best_score = film_id, score
+    return best
+
+
+def run(size, count, workdir):
+    films = catalogue(size)
+    path = str(workdir / f"entities-{size}.sqlite")
+    index = EntityIndex(TTLStore(path, "entities"))
+
+    start = time.perf_counter()
+    ids = [index.add(name, language, year)[0] for name, language, year in films]
+    index.flush()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reloaded = EntityIndex(TTLStore(path, "entities"))
+    reload = time.perf_counter() - start
+    assert len(reloaded) == len(index)
+
+    print(f"\n{size} films: built in {build:.2f}s ({build / size * 1e6:.0f} us/film), "
+          f"reloaded in {reload:.2f}s, {len(index.grams)} distinct trigrams")
+    print(f"  {'lookup':8} {'count':>6} {'correct':>8} {'mean us':>9} {'p99 us':>9}")
+
+    for kind, batch in queries(films, count).items():
+        times, correct = [], 0
+        for expected, name, language, year in batch:
+            start = time.perf_counter()
+            film_id, _ = index.match(name, language, year)
+            times.append(time.perf_counter() - start)
+            correct += film_id == (ids[expected] if expected is not None else None)
+        times.sort()
+        mean = sum(times) / len(times)
+        p99 = times[int(len(times) * 0.99) - 1]
+        print(f"  {kind:8} {len(batch):6} {correct / len(batch):8.1%} {mean * 1e6:9.1f} {p99 * 1e6:9.1f}")
+
+    sample = queries(films, 50)["fuzzy"]
+    start = time.perf_counter()
+    for _, name, _, _ in sample:
+        linear_match(index, name, index.threshold)
+    linear = (time.perf_counter() - start) / len(sample)
+    print(f"  linear scan (no index): {linear * 1e6:9.1f} us per lookup")
+
+    index.store.close()
+    reloaded.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--films", type=int, nargs="*", default=[10000, 50000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="icmb-bench-entities-"))
+    for size in args.films:
+        run(size, args.queries, workdir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
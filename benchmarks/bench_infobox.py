@@ -0,0 +1,118 @@
+# Compares the lxml infobox extractor in wiki_movie_full against the
+# previous BeautifulSoup implementation on the fixture corpus: checks that
+# both produce identical records and reports the per-page parse time. Field
+# normalization (ICMB.normalize) is shared, only the traversal differs.
+#
+#     python -m benchmarks.bench_infobox
+
+import re
+import sys
+
+from bs4 import BeautifulSoup
+
+from ICMB import infobox, normalize
+from ICMB.items import MovieItem, export_dict, export_fields
+from ICMB.spiders.wiki_movie_full import WikiMovieFullSpider
+from benchmarks.common import article_url, best_of, wiki_corpus
+
+
+class LegacyParser:
+    # parse_movie as it was before the single-pass extractor, filling the
+    # same export columns as MovieItem
+    def first_infobox_td(self, soup, label):
+        for tr in soup.select("table.infobox tr"):
+            th = tr.find("th")
+            if th and label.lower() in th.get_text(strip=True).lower():
+                return tr.find("td")
+        return None
+
+    def anchors(self, td):
+        if td is None:
+            return []
+        anchors = [a.get_text(strip=True) for a in td.find_all("a")]
+        return [a for a in anchors if a]
+
+    def text(self, td):
+        if td is None:
+            return ""
+        return re.sub(r'\s+', ' ', td.get_text(" ", strip=True)).strip()
+
+    def parse(self, text, url):
+        soup = BeautifulSoup(text, "lxml")
+        out = {c: "" for c in export_fields(MovieItem).values()}
+
+        title_tag = soup.select_one("#firstHeading")
+        raw_title = title_tag.get_text(strip=True) if title_tag else url.split("/")[-1]
+        out["Movie_name"] = normalize.movie_title(raw_title)
+
+        languages = self.anchors(self.first_infobox_td(soup, "Language"))
+        if not languages:
+            languages = self.text(self.first_infobox_td(soup, "Language")).split(",")
+        out["Original Language"] = languages[0].strip() if languages else ""
+
+        img = soup.select_one('table.infobox a.image img')
+        if img and img.get("src"):
+            src = img["src"]
+            out["poster"] = ("https:" + src) if src.startswith("//") else src
+
+        out[" Genres"] = ", ".join(self.anchors(self.first_infobox_td(soup, "Genre")))
+        out[" Directors"] = ", ".join(self.anchors(self.first_infobox_td(soup, "Director")))
+        out["Writer"] = ", ".join(self.anchors(self.first_infobox_td(soup, "Writer")))
+        out["Producer"] = ", ".join(self.anchors(self.first_infobox_td(soup, "Producer")))
+        out["Actors"] = ", ".join(self.anchors(self.first_infobox_td(soup, "Starring")))
+
+        raw_release = self.text(self.first_infobox_td(soup, "Release"))
+        out["Release Date"] = normalize.release_date(raw_release)
+        out["Years"] = normalize.release_year(raw_release)
+
+        out["Runtime"] = normalize.runtime(self.text(self.first_infobox_td(soup, "Running time")))
+        out["Budget"] = self.text(self.first_infobox_td(soup, "Budget"))
+        out["Box Office"] = self.text(self.first_infobox_td(soup, "Box office"))
+
+        for p in soup.select("div.mw-parser-output > p"):
+            text = p.get_text(" ", strip=True)
+            if len(text) > 80:
+                out["Plot"] = normalize.strip_citations(text)
+                break
+
+        return out
+
+
+def parse_lxml(spider, text, url):
+    doc = infobox.parse_html(text)
+    return spider.extract_record(doc, infobox.Infobox(doc), url)
+
+
+def main():
+    spider = WikiMovieFullSpider()
+    legacy = LegacyParser()
+
+    total_old = total_new = 0.0
+    mismatches = 0
+
+    print(f"{'page':40} {'bs4 ms':>8} {'lxml ms':>8} {'speedup':>8}")
+    for title, _, text in wiki_corpus():
+        url = article_url(title)
+
+        old = legacy.parse(text, url)
+        new = export_dict(parse_lxml(spider, text, url))
+        if old != new:
+            mismatches += 1
+            diff = {k: (old.get(k), new.get(k)) for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+            print(f"MISMATCH {title}: {diff}")
+
+        t_old = best_of(lambda: legacy.parse(text, url))
+        t_new = best_of(lambda: parse_lxml(spider, text, url))
+        total_old += t_old
+        total_new += t_new
+        print(f"{title[:40]:40} {t_old * 1000:8.2f} {t_new * 1000:8.2f} {t_old / t_new:7.1f}x")
+
+    print(f"{'total':40} {total_old * 1000:8.2f} {total_new * 1000:8.2f} {total_old / total_new:7.1f}x")
+
+    if mismatches:
+        print(f"{mismatches} page(s) differ between implementations")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
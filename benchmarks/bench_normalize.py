@@ -0,0 +1,179 @@
+# Checks ICMB.normalize (and the CBFC rating pattern of ICMB.enrichment)
+# against a table of infobox / PVR / search snippet strings with known
+# results, then times it against the helpers it replaced on the strings a
+# crawl of the fixture corpus actually sees (infobox release and running
+# time cells, page headings, PVR film names), cold and with a warm cache.
+#
+#     python -m benchmarks.bench_normalize
+
+import json
+import re
+import sys
+from datetime import datetime
+
+from ICMB import enrichment, infobox, normalize
+from ICMB.spiders.wiki_movie_full import WikiMovieFullSpider
+from benchmarks.common import FIXTURES, best_of, wiki_corpus
+
+# (function, input, expected)
+CASES = [
+    (normalize.release_date, "25 December 2025 ( 25 December 2025 )", "25-Dec-2025"),
+    (normalize.release_date, "9 Jan 2026", "09-Jan-2026"),
+    (normalize.release_date, "January 12, 2026 ( January 12, 2026 )", "12-Jan-2026"),
+    (normalize.release_date, "Sept. 5, 2025", "05-Sep-2025"),
+    (normalize.release_date, "2026-01-09", "09-Jan-2026"),
+    (normalize.release_date, "9–11 January 2026", "09-Jan-2026"),
+    (normalize.release_date, "December 25 – 27, 2025", "25-Dec-2025"),
+    (normalize.release_date, "30 December 2025 – 2 January 2026", "30-Dec-2025"),
+    (normalize.release_date, "24 January 2025 (India) 22 January 2025 (premiere)", "24-Jan-2025"),
+    (normalize.release_date, "31 February 2025", "31 February 2025"),
+    (normalize.release_date, "2026 (India)", "2026"),
+    (normalize.release_date, "", ""),
+    (normalize.release_year, "25 December 2025 ( 25 December 2025 )", "2025"),
+    (normalize.release_year, "TBA", ""),
+    (normalize.runtime, "140 minutes [ 122 ]", "140 min"),
+    (normalize.runtime, "148 min", "148 min"),
+    (normalize.runtime, "140min", "140 min"),
+    (normalize.runtime, "2 hours 43 minutes [ 122 ]", "163 min"),
+    (normalize.runtime, "2h 32m [ 122 ]", "152 min"),
+    (normalize.runtime, "2h32m", "152 min"),
+    (normalize.runtime, "2hrs30mins", "150 min"),
+    (normalize.runtime, "2 hrs 50 mins", "170 min"),
+    (normalize.runtime, "2 hours", "120 min"),
+    (normalize.runtime, "1.5 hours", "90 min"),
+    (normalize.runtime, "165 minutes (theatrical) 180 minutes (extended)", "165 min"),
+    (normalize.runtime, "TBA", "TBA"),
+    (normalize.movie_title, "Sirai (2025 film)", "Sirai (2025)"),
+    (normalize.movie_title, "Nari_Nari_Naduma_Murari_(2026_film)", "Nari Nari Naduma Murari (2026)"),
+    (normalize.movie_title, "Sky Force (film)", "Sky Force"),
+    (normalize.movie_title, "The RajaSaab", "The RajaSaab"),
+    (normalize.pvr_film, "SIRAI (TAMIL)", ("SIRAI", "TAMIL")),
+    (normalize.pvr_film, "Kaantha Nilavu (Tamil) (U/A)", ("KAANTHA NILAVU", "TAMIL")),
+    (normalize.pvr_film, "BORDER 2 HINDI 3D", ("BORDER 2 HINDI 3D", "HINDI")),
+    (normalize.pvr_film, "AVATAR: FIRE AND ASH (ENGLISH)", ("AVATAR: FIRE AND ASH", "UNKNOWN")),
+    (normalize.strip_citations, "It stars Prabhas. [ 60 ] The film[12] was shot[a].", "It stars Prabhas.  The film was shot."),
+    (enrichment.censorship_rating, "Border 2 was certified U/A 13+ by the CBFC.", "U/A 13+"),
+    (enrichment.censorship_rating, "CBFC rating: A", "A"),
+    (enrichment.censorship_rating, "Rating:U", "U"),
+    (enrichment.censorship_rating, "The film's certificate (U/A) was issued", "U/A"),
+    (enrichment.censorship_rating, "Certificate: UA16+ | Runtime 2h 40m", "UA16+"),
+    (enrichment.censorship_rating, "certified 'A' by the board", "A"),
+    (enrichment.censorship_rating, "The CBFC. A new film by Atlee", ""),
+    (enrichment.censorship_rating, "received its certification. A sequel is planned", ""),
+    (enrichment.censorship_rating, "Critics rating A decent watch", ""),
+    (enrichment.censorship_rating, "rated A by the board", ""),
+    (enrichment.censorship_rating, "The certificate is yet to be issued. U and others", ""),
+]
+
+
+# The wiki_movie_full / pvr_now_showing_wiki helpers before ICMB.normalize
+def legacy_release_date(raw):
+    if not raw:
+        return ""
+    cleaned = re.sub(r"\(.*?\)", "", raw).strip()
+    for fmt in ("%d %B %Y", "%d %b %Y"):
+        try:
+            return datetime.strptime(cleaned, fmt).strftime("%d-%b-%Y")
+        except Exception:
+            pass
+    return cleaned
+
+
+def legacy_runtime(raw):
+    if not raw:
+        return ""
+    m = re.search(r"(\d+)\s*min", raw.lower())
+    if m:
+        return f"{m.group(1)} min"
+    m = re.search(r"(\d+)\s*h", raw.lower())
+    if m:
+        return f"{int(m.group(1))*60} min"
+    return raw
+
+
+def legacy_movie_title(title):
+    title = title.replace("_", " ")
+    year_match = re.search(r"\b(19|20)\d{2}\b", title)
+    year = year_match.group(0) if year_match else ""
+    name = title.split("(")[0].strip()
+    return f"{name} ({year})" if year else name
+
+
+def legacy_pvr_film(raw_name):
+    raw_name = raw_name.upper().strip()
+    language = "UNKNOWN"
+    for lang in ("TAMIL", "TELUGU", "HINDI", "KANNADA", "MALAYALAM"):
+        if f"({lang}" in raw_name or f" {lang} " in raw_name:
+            language = lang
+            break
+    return raw_name.split("(")[0].strip(), language
+
+
+def crawl_strings():
+    # What one crawl feeds each normalizer: every infobox cell and heading
+    # of the corpus, and every film name of every city's PVR response
+    cells = {"release": [], "runtime": [], "title": []}
+    for _, _, text in wiki_corpus():
+        doc = infobox.parse_html(text)
+        box = infobox.Infobox(doc)
+        cells["release"].append(WikiMovieFullSpider.extract_text_from_td(box.cell("Release")))
+        cells["runtime"].append(WikiMovieFullSpider.extract_text_from_td(box.cell("Running time")))
+        cells["title"].append(infobox.get_text(infobox.first(doc, infobox.FIRST_HEADING), strip=True))
+
+    pvr = json.loads((FIXTURES / "pvr" / "nowshowing.json").read_text(encoding="utf-8"))
+    cells["pvr"] = [
+        film["filmName"] for response in pvr.values()
+        for block in response["output"]["mv"] for film in block["films"]
+    ]
+    return cells
+
+
+def check():
+    failures = 0
+    for fn, raw, expected in CASES:
+        got = fn(raw)
+        if got != expected:
+            failures += 1
+            print(f"FAIL {fn.__name__}({raw!r}) = {got!r}, expected {expected!r}")
+    print(f"{len(CASES) - failures}/{len(CASES)} cases pass")
+    return failures
+
+
+def main():
+    failures = check()
+    cells = crawl_strings()
+
+    pairs = [
+        ("release", legacy_release_date, normalize.release_date),
+        ("runtime", legacy_runtime, normalize.runtime),
+        ("title", legacy_movie_title, normalize.movie_title),
+        ("pvr", legacy_pvr_film, normalize.pvr_film),
+    ]
+
+    print(f"\n{'field':10} {'strings':>8} {'changed':>8} {'legacy us':>10} {'cold us':>10} {'warm us':>10}")
+    for field, legacy, new in pairs:
+        strings = cells[field]
+        changed = sum(legacy(s) != new(s) for s in strings)
+
+        def run_cold():
+            new.cache_clear()
+            for s in strings:
+                new(s)
+
+        def run_warm():
+            for s in strings:
+                new(s)
+
+        t_legacy = best_of(lambda: [legacy(s) for s in strings], number=20)
+        t_cold = best_of(run_cold, number=20)
+        run_warm()
+        t_warm = best_of(run_warm, number=20)
+        n = len(strings)
+        print(f"{field:10} {n:8} {changed:8} {t_legacy / n * 1e6:10.2f} {t_cold / n * 1e6:10.2f} {t_warm / n * 1e6:10.2f}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# End-to-end benchmark of the spiders against the local stand-in server
+# (benchmarks/server.py), pipelines included.
+#
+# Every scenario runs in its own process (the Twisted reactor cannot be
+# restarted) with a fresh state directory, so title index and caches are
+# cold. Scenarios in WARM_RUNS are measured on a second run over the state
+# the first one left behind, and fail unless that run counted the stats
+# they list (wiki_html_incremental: articles skipped as unchanged). Reported per scenario: throughput, peak RSS of the crawl process and
+# CPU time per spider callback (from the ICMB.instrumentation histograms).
+# Results are compared with benchmarks/baseline.json; --save-baseline
+# records a new one.
+#
+#     python -m benchmarks.bench_spiders
+#     python -m benchmarks.bench_spiders wiki_html wiki_api --repeat 5
+#     python -m benchmarks.bench_spiders wiki_html wiki_html_pool
+#     python -m benchmarks.bench_spiders wiki_html_incremental
+#     python -m benchmarks.bench_spiders --save-baseline
+#     python -m benchmarks.bench_spiders --check          # exit 1 on regression
+#     python -m benchmarks.bench_spiders ottplay --profile
+
+import argparse
+import cProfile
+import json
+import platform
+import pstats
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import article_url, wiki_corpus
+from benchmarks.fixtures.make_api_fixtures import WINDOW_START
+from benchmarks.server import StandInServer
+
+ROOT = Path(__file__).parent.parent
+BASELINE = Path(__file__).parent / "baseline.json"
+
+# name -> (spider, spider arguments)
+SCENARIOS = {
+    "now_showing": ("pvr_now_showing_wiki", {}),
+    "ottplay": ("ottplay_latest", {"from_date": WINDOW_START, "to_date": "2026-01-17"}),
+    "wiki_html": ("wiki_movie_full", {"fetch": "html"}),
+    "wiki_html_pool": ("wiki_movie_full", {"fetch": "html", "parse_workers": 4}),
+    "wiki_api": ("wiki_movie_full", {"fetch": "api"}),
+    "wiki_enrich": ("wiki_movie_full", {"fetch": "api", "enrich": "true"}),
+    "wiki_html_incremental": ("wiki_movie_full", {"fetch": "html", "incremental": "true"}),
+}
+
+# name -> stats the measured (second) run must have counted
+WARM_RUNS = {
+    "wiki_html_incremental": ("wiki/revision_unchanged",),
+}
+
+# The stand-in serves the corpus on every wikipedia.org host, so listing
+# each article once per host gives wiki_movie_full distinct pages to fetch
+WIKI_HOSTS = ["en", "ta", "te", "hi", "kn", "ml", "bn", "mr"]
+
+# metric -> True when higher is better
+COMPARED = {
+    "items_per_sec": True,
+    "responses_per_sec": True,
+    "peak_rss_mb": False,
+}
+
+
+def bench_settings(settings, workdir, server_url):
+    return {
+        "BENCH_SERVER_URL": server_url,
+        "DOWNLOADER_MIDDLEWARES": {
+            **settings.getdict("DOWNLOADER_MIDDLEWARES"),
+            "benchmarks.server.StandInMiddleware": 1,
+        },
+        "RESPONSE_CACHE_MODE": "off",
+        "ADAPTIVE_THROTTLE_ENABLED": False,
+        "DOWNLOAD_SLOTS": {},
+        "OTT_LOOKUP_DELAY": 0,
+        # Only the wiki_enrich scenario runs the lookups, so the other wiki
+        # scenarios keep measuring parsing
+        "WIKI_ENRICH": False,
+        "CONCURRENT_REQUESTS": 32,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 32,
+        "ICMB_STATE_DB": str(workdir / "state.sqlite"),
+        "STORAGE_SQLITE_PATH": str(workdir / "items.sqlite"),
+        "CHANGES_LOG": str(workdir / "changes.jsonl"),
+        "INSTRUMENTATION_ENABLED": True,
+        "INSTRUMENTATION_REPORT": str(workdir / "{spider}.json"),
+        "INSTRUMENTATION_PROMETHEUS_FILE": None,
+        "TELNETCONSOLE_ENABLED": False,
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def run_scenario(name, server_url, profile=False, workdir=None):
+    # Imported here so the parent process stays free of Scrapy state
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from ICMB.instrumentation import histograms
+
+    spider_name, args = SCENARIOS[name]
+    workdir = Path(workdir or tempfile.mkdtemp(prefix=f"icmb-bench-{name}-"))
+
+    if spider_name == "wiki_movie_full":
+        source = workdir / "urls.txt"
+        titles = [title for title, _, _ in wiki_corpus()]
+        source.write_text("".join(
+            article_url(title).replace("//en.", f"//{lang}.", 1) + "\n" for lang in WIKI_HOSTS for title in titles
+        ), encoding="utf-8")
+        args = {**args, "source": str(source)}
+
+    settings = get_project_settings()
+    settings.setdict(bench_settings(settings, workdir, server_url), priority="cmdline")
+
+    process = CrawlerProcess(settings, install_root_handler=False)
+    crawler = process.create_crawler(spider_name)
+    process.crawl(crawler, **args)
+
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    process.start()
+    if profiler:
+        profiler.disable()
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(r"ICMB|lxml|json", 25)
+
+    stats = crawler.stats
+    elapsed = stats.get_value("elapsed_time_seconds") or 0
+    items = stats.get_value("item_scraped_count", 0)
+    responses = stats.get_value("downloader/response_count", 0)
+
+    callbacks = {}
+    for label, hist in sorted(histograms(stats).get("callback_cpu", {}).items()):
+        callbacks[label] = {
+            "calls": hist["count"],
+            "cpu_ms_total": round(hist["sum"] * 1000, 2),
+            "cpu_ms_mean": round(hist["sum"] * 1000 / hist["count"], 3) if hist["count"] else 0,
+        }
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": stats.get_value("downloader/request_count", 0),
+        "responses": responses,
+        "items": items,
+        "items_per_sec": round(items / elapsed, 2) if elapsed else 0,
+        "responses_per_sec": round(responses / elapsed, 2) if elapsed else 0,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "callbacks": callbacks,
+        "stats": {stat: stats.get_value(stat, 0) for stat in WARM_RUNS.get(name, ())},
+    }
+
+
+def run_child(name, server_url, profile=False, workdir=None):
+    cmd = [sys.executable, "-m", "benchmarks.bench_spiders", "--child", name, "--server", server_url]
+    if profile:
+        cmd.append("--profile")
+    if workdir:
+        cmd += ["--workdir", workdir]
+
+    proc = subprocess.run(cmd, cwd=ROOT, stdout=subprocess.PIPE, stderr=None if profile else subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(name, server_url, profile=False):
+    if name not in WARM_RUNS:
+        return run_child(name, server_url, profile)
+    workdir = tempfile.mkdtemp(prefix=f"icmb-bench-{name}-")
+    run_child(name, server_url, workdir=workdir)
+    return run_child(name, server_url, profile, workdir)
+
+
+def missing_stats(name, result):
+    return [stat for stat in WARM_RUNS.get(name, ()) if not result["stats"].get(stat)]
+
+
+def best_run(runs):
+    # Best of N: highest throughput, lowest memory, lowest CPU per callback
+    best = dict(runs[0])
+    for metric, higher in COMPARED.items():
+        values = [r[metric] for r in runs]
+        best[metric] = max(values) if higher else min(values)
+    best["elapsed_seconds"] = min(r["elapsed_seconds"] for r in runs)
+    best["stats"] = {stat: min(r["stats"][stat] for r in runs) for stat in runs[0]["stats"]}
+
+    best["callbacks"] = {}
+    for label in runs[0]["callbacks"]:
+        fastest = min((r["callbacks"][label] for r in runs if label in r["callbacks"]), key=lambda c: c["cpu_ms_mean"])
+        best["callbacks"][label] = fastest
+    return best
+
+
+def compare(name, result, baseline, threshold):
+    regressions = []
+
+    def check(label, new, old, higher):
+        if not old:
+            return
+        change = (new - old) / old
+        worse = -change if higher else change
+        mark = "  REGRESSION" if worse > threshold else ""
+        print(f"    {label:<28} {old:>10} -> {new:<10} ({change:+.1%}){mark}")
+        if mark:
+            regressions.append(f"{name}: {label}")
+
+    for metric, higher in COMPARED.items():
+        check(metric, result[metric], baseline.get(metric), higher)
+    for label, cb in result["callbacks"].items():
+        old = baseline.get("callbacks", {}).get(label)
+        if old:
+            check(f"{label} cpu ms/call", cb["cpu_ms_mean"], old["cpu_ms_mean"], False)
+
+    if result["items"] != baseline.get("items"):
+        print(f"    items                        {baseline.get('items')} -> {result['items']}  (output changed)")
+        regressions.append(f"{name}: item count")
+
+    return regressions
+
+
+def report(name, result):
+    print(
+        f"{name:<12} {result['items']:>5} items {result['responses']:>5} responses "
+        f"{result['elapsed_seconds']:>7.2f}s {result['items_per_sec']:>8.1f} items/s "
+        f"{result['responses_per_sec']:>8.1f} resp/s  peak RSS {result['peak_rss_mb']:.0f} MB"
+    )
+    for label, cb in result["callbacks"].items():
+        print(f"    {label:<24} {cb['calls']:>5} calls {cb['cpu_ms_mean']:>9.3f} ms/call {cb['cpu_ms_total']:>9.1f} ms total")
+    for stat, value in result.get("stats", {}).items():
+        print(f"    {stat:<24} {value:>5}{'' if value else '  MISSING'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change counted as a regression")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions")
+    parser.add_argument("--profile", action="store_true", help="print a cProfile summary per run")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.server, args.profile, args.workdir)))
+        return 0
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    baseline = json.loads(BASELINE.read_text(encoding="utf-8")) if BASELINE.exists() else None
+
+    results = {}
+    with StandInServer() as server:
+        for name in names:
+            runs = [measure(name, server.base_url, args.profile) for _ in range(max(1, args.repeat))]
+            results[name] = best_run(runs)
+            report(name, results[name])
+
+    # A warm run that skipped nothing is broken, not slow
+    failed = [f"{name}: {stat}" for name, result in results.items() for stat in missing_stats(name, result)]
+    if failed:
+        print("\nMissing warm-run stats: " + ", ".join(failed))
+        return 1
+
+    if args.save_baseline:
+        saved = baseline["scenarios"] if baseline else {}
+        saved.update(results)
+        BASELINE.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scenarios": saved,
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {BASELINE.relative_to(ROOT)}")
+        return 0
+
+    if baseline is None:
+        print("No baseline yet; record one with --save-baseline")
+        return 0
+
+    regressions = []
+    print(f"\nAgainst baseline (python {baseline['python']}, threshold {args.threshold:.0%}):")
+    for name, result in results.items():
+        if name in baseline["scenarios"]:
+            print(f"  {name}")
+            regressions += compare(name, result, baseline["scenarios"][name], args.threshold)
+
+    if regressions:
+        print("\nRegressions: " + ", ".join(regressions))
+        return 1 if args.check else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# Checks the freshness rules of the response cache
+# (ICMB.middlewares.IcmbDownloaderMiddleware) with the project's
+# RESPONSE_CACHE_TTLS: Wikipedia articles and /w/api.php answers are stored
+# and served while fresh, and once older than its own TTL an api.php answer
+# (revision checks, title and search lookups) goes back to the network even
+# though articles of the same host are still fresh. An article that
+# wiki_movie_full re-fetches because its revision changed is downloaded even
+# while its cache entry is fresh, and the new page replaces that entry.
+# Entries are aged by moving their stored_at back, so the check takes no
+# wall time.
+#
+#     python -m benchmarks.check_cache
+
+import sys
+import tempfile
+
+from scrapy.http import HtmlResponse, Request, TextResponse
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.test import get_crawler
+
+from ICMB.httpcache import DiskResponseCache, request_key
+from ICMB.middlewares import IcmbDownloaderMiddleware
+from ICMB.spiders.wiki_movie_full import WikiMovieFullSpider
+
+ARTICLE = "https://en.wikipedia.org/wiki/Sirai_(2025_film)"
+API = "https://en.wikipedia.org/w/api.php?action=query&prop=info&titles=Sirai_(2025_film)&format=json"
+
+
+def middleware(workdir):
+    settings = get_project_settings()
+    stats = MemoryStatsCollector(get_crawler())
+    cache = DiskResponseCache(workdir, settings.getint("RESPONSE_CACHE_MAX_BYTES"))
+    return IcmbDownloaderMiddleware(
+        cache,
+        "normal",
+        settings.getdict("RESPONSE_CACHE_TTLS"),
+        settings.getint("RESPONSE_CACHE_DEFAULT_TTL"),
+        stats,
+    )
+
+
+def store(mw, url, respcls, body, request=None):
+    request = request or Request(url)
+    assert mw.process_request(request, None) is None
+    mw.process_response(request, respcls(url=url, status=200, body=body, encoding="utf-8", request=request), None)
+
+
+def served(mw, url, request=None):
+    response = mw.process_request(request or Request(url), None)
+    return response is not None and "cached" in response.flags
+
+
+def age(mw, url, seconds):
+    key = request_key(Request(url))
+    mw.cache.conn.execute("UPDATE entries SET stored_at = stored_at - ? WHERE key = ?", (seconds, key))
+
+
+def check():
+    mw = middleware(tempfile.mkdtemp(prefix="icmb-check-cache-"))
+    article_ttl = mw.ttl_for(Request(ARTICLE))
+    api_ttl = mw.ttl_for(Request(API))
+    print(f"TTL /wiki/ {article_ttl}s, /w/api.php {api_ttl}s")
+
+    failures = []
+    if not 0 < api_ttl < article_ttl:
+        failures.append("api.php should expire sooner than articles")
+
+    store(mw, ARTICLE, HtmlResponse, "<html><body>Sirai</body></html>")
+    store(mw, API, TextResponse, '{"query": {"pages": {"1": {"lastrevid": 1}}}}')
+    if not (served(mw, ARTICLE) and served(mw, API)):
+        failures.append("fresh entries should be served from the cache")
+
+    # Just past the API TTL: articles are still fresh, api.php is not
+    age(mw, ARTICLE, api_ttl + 1)
+    age(mw, API, api_ttl + 1)
+    if not served(mw, ARTICLE):
+        failures.append("article should still be fresh")
+    if served(mw, API):
+        failures.append("api.php served from the cache after its TTL")
+
+    # Incremental mode found a newer revision of the (still fresh) article
+    spider = WikiMovieFullSpider(incremental=True)
+    if served(mw, ARTICLE, spider.movie_request(ARTICLE, refresh=True)):
+        failures.append("article with a new revision served from the cache")
+    store(mw, ARTICLE, HtmlResponse, "<html><body>Sirai, revised</body></html>",
+          spider.movie_request(ARTICLE, refresh=True))
+    response = mw.process_request(Request(ARTICLE), None)
+    if response is None or b"revised" not in response.body:
+        failures.append("re-fetched article did not replace the cached one")
+
+    mw.cache.close()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("ok" if not failures else f"{len(failures)} failures")
+    return len(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check() else 0)
@@ -0,0 +1,31 @@
+# Shared helpers for the benchmark scripts.
+
+import gzip
+import json
+import time
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def wiki_corpus():
+    index = json.loads((FIXTURES / "wiki" / "index.json").read_text(encoding="utf-8"))
+    for title, meta in index.items():
+        with gzip.open(FIXTURES / "wiki" / meta["file"], "rt", encoding="utf-8") as fh:
+            yield title, meta, fh.read()
+
+
+def article_url(title):
+    from ICMB import wikipedia
+    return wikipedia.page_url(title)
+
+
+def best_of(fn, repeat=5, number=3):
+    # Best per-call wall time over `repeat` runs of `number` calls
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
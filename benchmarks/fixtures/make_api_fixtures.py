@@ -0,0 +1,184 @@
+# Regenerates the API fixtures served by the benchmark stand-in server:
+#
+#   pvr/nowshowing.json      PVR now-showing responses, one per city
+#   ottplay/page-<n>.json    OTTplay new-release pages
+#   ddg/results-<n>.html     DuckDuckGo HTML result pages
+#
+# Responses follow the shape (and roughly the size) of the live endpoints.
+# Films come from the Wikipedia corpus so now-showing lookups resolve
+# against it, plus a few titles without an article to exercise the search
+# fallback. Output is deterministic.
+#
+#     python -m benchmarks.fixtures.make_api_fixtures
+
+import json
+import random
+from pathlib import Path
+from urllib.parse import quote
+
+from benchmarks.fixtures.make_wiki_corpus import FILMS, WORDS
+
+OUT_DIR = Path(__file__).parent
+
+CITIES = ["Bengaluru", "Chennai", "Hyderabad", "Mumbai", "Delhi-NCR", "Kolkata", "Pune", "Kochi"]
+
+# Now showing without a Wikipedia article in the corpus
+EXTRA_FILMS = [
+    ("Kaantha Nilavu", "Tamil"), ("Bhoot Bangla Returns", "Hindi"), ("Chiru Navvu", "Telugu"),
+    ("Kaadu Malli", "Kannada"), ("Ormakal", "Malayalam"), ("Avatar: Fire and Ash", "English"),
+]
+
+PROVIDERS = [
+    ("Netflix", "netflix.com"), ("Prime Video", "primevideo.com"), ("JioHotstar", "hotstar.com"),
+    ("ZEE5", "zee5.com"), ("Sony LIV", "sonyliv.com"), ("aha", "aha.video"), ("Sun NXT", "sunnxt.com"),
+]
+
+OTT_LANGUAGES = ["Tamil", "Telugu", "Hindi", "Kannada", "Malayalam", "English", "Bengali", "Marathi"]
+
+# ottplay_latest is benchmarked with this release window
+WINDOW_START = "2026-01-10"
+OTT_PAGES = 6
+OTT_PAGE_SIZE = 20
+OTT_PAGES_IN_WINDOW = 4
+
+DDG_PAGES = 4
+
+
+def words(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def pvr_film(rng, n, name, language):
+    return {
+        "filmId": f"HO{n:08d}",
+        "filmName": f"{name.upper()} ({language.upper()})",
+        "filmCommonName": name.upper(),
+        "genres": [rng.choice(["Action", "Drama", "Comedy", "Thriller", "Romance"])],
+        "certificate": rng.choice(["U", "UA", "UA13+", "A"]),
+        "duration": rng.randint(110, 200),
+        "language": language.upper(),
+        "formats": rng.sample(["2D", "3D", "IMAX 2D", "4DX", "P[XL]"], 2),
+        "releaseDate": "2026-01-%02d" % rng.randint(1, 23),
+        "imageUrl": f"https://media.pvrcinemas.com/gallery/posters/{n}.jpg",
+        "trailerUrl": f"https://www.youtube.com/watch?v={n:011d}",
+        "synopsis": words(rng, 40),
+        "cast": [words(rng, 2).title() for _ in range(6)],
+    }
+
+
+def pvr_response(rng, city, films):
+    blocks = []
+    for start in range(0, len(films), 6):
+        blocks.append({
+            "genre": rng.choice(["Trending", "Regional", "Popular", "New Releases"]),
+            "films": films[start:start + 6],
+        })
+    return {"result": "success", "code": 10001, "msg": "OK", "output": {"city": city, "mv": blocks}}
+
+
+def make_pvr(rng):
+    catalogue = []
+    for n, film in enumerate(FILMS):
+        catalogue.append(pvr_film(rng, n, film["title"].split(" (")[0], film["language"]))
+    for n, (name, language) in enumerate(EXTRA_FILMS, start=len(FILMS)):
+        catalogue.append(pvr_film(rng, n, name, language))
+
+    return {city: pvr_response(rng, city, rng.sample(catalogue, rng.randint(12, len(catalogue))))
+            for city in CITIES}
+
+
+def ott_result(rng, n, in_window):
+    day = rng.randint(10, 17) if in_window else rng.randint(1, 9)
+    language = rng.choice(OTT_LANGUAGES)
+    name = words(rng, rng.randint(1, 3)).title()
+    providers = rng.sample(PROVIDERS, rng.randint(1, 3))
+    return {
+        "ottplay_id": f"{quote(name.lower().replace(' ', '-'))}/{n:012x}",
+        "name": name,
+        "display_name": name,
+        "content_type": "movie",
+        "primary_language": {"name": language, "logo_text": language},
+        "genres": [{"name": rng.choice(["Action", "Drama", "Comedy", "Thriller"])}],
+        "release_year": 2025,
+        "ottplay_rating": round(rng.uniform(5, 9.5), 1),
+        "synopsis": words(rng, 30),
+        "poster": {"url": f"https://images.ottplay.com/posters/{n}.jpg"},
+        "where_to_watch": [
+            {
+                "provider": {"name": provider, "domain": domain},
+                "available_from": f"2026-01-{day:02d}T00:00:00.000Z",
+                "link": f"https://www.{domain}/title/{n}",
+                "subscription_type": rng.choice(["SVOD", "TVOD", "AVOD"]),
+            }
+            for provider, domain in providers
+        ],
+    }
+
+
+def make_ottplay(rng):
+    pages = {}
+    n = 0
+    for page in range(1, OTT_PAGES + 1):
+        results = []
+        for _ in range(OTT_PAGE_SIZE):
+            results.append(ott_result(rng, n, page <= OTT_PAGES_IN_WINDOW))
+            n += 1
+        pages[page] = {"success": True, "page": page, "total_pages": OTT_PAGES, "result": results}
+    return pages
+
+
+def ddg_result(rng, url):
+    uddg = quote(url, safe="")
+    return (
+        '<div class="result results_links results_links_deep web-result "><div class="links_main links_deep result__body">'
+        f'<h2 class="result__title"><a rel="nofollow" class="result__a" href="//duckduckgo.com/l/?uddg={uddg}&amp;rut={rng.getrandbits(64):016x}">'
+        f'{words(rng, 6).title()}</a></h2>'
+        f'<div class="result__extras"><div class="result__extras__url"><a class="result__url" href="{url}">{url}</a></div></div>'
+        f'<a class="result__snippet" href="{url}">{words(rng, 25)}</a>'
+        '<div class="clear"></div></div></div>'
+    )
+
+
+def make_ddg(rng):
+    pages = {}
+    for page in range(1, DDG_PAGES + 1):
+        urls = [
+            f"https://www.{rng.choice(['imdb.com', 'ottplay.com', 'justwatch.com', 'timesofindia.indiatimes.com'])}/title/{rng.randint(1, 10 ** 6)}"
+            for _ in range(8)
+        ]
+        # Most result pages carry a link to a platform from OTT_PRIORITY
+        if page < DDG_PAGES:
+            _, domain = rng.choice(PROVIDERS)
+            urls.insert(rng.randint(0, 4), f"https://www.{domain}/movies/{rng.randint(1, 10 ** 6)}")
+
+        pages[page] = (
+            '<!DOCTYPE html><html><head><meta charset="UTF-8"><title>DuckDuckGo</title>'
+            '<link rel="stylesheet" href="/dist/h.css" type="text/css"></head><body>'
+            '<div id="links" class="results">' + "".join(ddg_result(rng, u) for u in urls) + "</div>"
+            '<div class="nav-link"><form action="/html/" method="post"><input type="submit" class="btn" value="Next" /></form></div>'
+            "</body></html>"
+        )
+    return pages
+
+
+def main():
+    rng = random.Random(2026)
+
+    (OUT_DIR / "pvr").mkdir(exist_ok=True)
+    (OUT_DIR / "pvr" / "nowshowing.json").write_text(
+        json.dumps(make_pvr(rng), indent=1, ensure_ascii=False) + "\n", encoding="utf-8"
+    )
+
+    (OUT_DIR / "ottplay").mkdir(exist_ok=True)
+    for page, data in make_ottplay(rng).items():
+        (OUT_DIR / "ottplay" / f"page-{page}.json").write_text(
+            json.dumps(data, indent=1, ensure_ascii=False) + "\n", encoding="utf-8"
+        )
+
+    (OUT_DIR / "ddg").mkdir(exist_ok=True)
+    for page, text in make_ddg(rng).items():
+        (OUT_DIR / "ddg" / f"results-{page}.html").write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+# Regenerates the Wikipedia film article corpus used by the benchmarks.
+#
+# The pages reproduce the markup of rendered en.wikipedia.org film articles
+# (skin chrome, RLCONF, infobox with TemplateStyles, references, navboxes)
+# at realistic sizes, so parser benchmarks see the same work as live pages.
+#
+#     python -m benchmarks.fixtures.make_wiki_corpus
+
+import gzip
+import html
+import json
+import random
+from pathlib import Path
+from urllib.parse import quote
+
+OUT_DIR = Path(__file__).parent / "wiki"
+
+FILMS = [
+    {
+        "title": "Sirai (2025 film)", "language": "Tamil", "genre": "legal thriller",
+        "directed": ["Suresh Rajakumari"], "screenplay": ["Tamizh", "Suresh Rajakumari"],
+        "produced": ["S. S. Lalit Kumar"], "starring": ["Vikram Prabhu", "LK Akshay Kumar", "Anishma Anilkumar"],
+        "cinematography": "Madhesh Manickam", "edited": "Philomin Raj", "music": "Justin Prabhakaran",
+        "company": "Seven Screen Studio", "release": ["25 December 2025"],
+        "runtime": "140 minutes", "budget": "₹20 crore", "box_office": "est. ₹35 crore",
+    },
+    {
+        "title": "The RajaSaab", "language": "Telugu", "genre": "horror comedy",
+        "directed": ["Maruthi"], "written": ["Maruthi"], "produced": ["T. G. Vishwa Prasad", "Vivek Kuchibotla"],
+        "starring": ["Prabhas", "Sanjay Dutt", "Malavika Mohanan", "Nidhhi Agerwal", "Riddhi Kumar"],
+        "cinematography": "Karthik Palani", "edited": "Kotagiri Venkateswara Rao", "music": "Thaman S",
+        "company": "People Media Factory", "release": ["9 January 2026"],
+        "runtime": "183 minutes", "budget": "₹400–450 crore", "box_office": "₹209 crore",
+    },
+    {
+        "title": "Mana Shankara Vara Prasad Garu", "language": "Telugu", "genre": "action comedy",
+        "directed": ["Anil Ravipudi"], "written": ["Anil Ravipudi"], "produced": ["Sahu Garapati", "Sushmita Konidela"],
+        "starring": ["Chiranjeevi", "Nayanthara", "Venkatesh"],
+        "cinematography": "Sameer Reddy", "edited": "Tammiraju", "music": "Bheems Ceciroleo",
+        "company": "Shine Screens", "release": ["January 12, 2026"],
+        "runtime": "2 hours 43 minutes", "budget": "₹200 crore", "box_office": "₹300 crore",
+    },
+    {
+        "title": "Anaganaga Oka Raju", "language": "Telugu", "genre": "comedy",
+        "directed": ["Maari"], "written": ["Maari"], "produced": ["Suryadevara Naga Vamsi", "Sai Soujanya"],
+        "starring": ["Naveen Polishetty", "Meenakshi Chaudhary"],
+        "cinematography": "J. Yuvraj", "edited": "Naveen Nooli", "music": "Mickey J. Meyer",
+        "company": "Sithara Entertainments", "release": ["14 January 2026"],
+        "runtime": "148 min", "budget": "₹60 crore", "box_office": "₹100 crore",
+    },
+    {
+        "title": "Nari Nari Naduma Murari (2026 film)", "language": "Telugu", "genre": "romantic comedy",
+        "directed": ["Ram Abbaraju"], "written": ["Bhanu Bogavarapu", "Nandu Savirigana"], "produced": ["Ramabrahmam Sunkara"],
+        "starring": ["Sharwanand", "Samyuktha", "Sakshi Vaidya"],
+        "cinematography": "Gnana Shekar V. S.", "edited": "Prawin Pudi", "music": "Vishal Chandrashekhar",
+        "company": "AK Entertainments", "release": ["14 January 2026"],
+        "runtime": "145 minutes", "budget": "₹50 crore", "box_office": "₹40 crore",
+    },
+    {
+        "title": "Mark (2025 film)", "language": "Kannada", "genre": "action thriller",
+        "directed": ["Vijay Kartikeyaa"], "written": ["Vijay Kartikeyaa"], "produced": ["Sathya Jyothi Films"],
+        "starring": ["Sudeepa", "Yogi Babu", "Naveen Chandra", "Shine Tom Chacko"],
+        "cinematography": "Shekhar Chandra", "edited": "S. R. Ganesh Babu", "music": "B. Ajaneesh Loknath",
+        "company": "Kichcha Creations", "release": ["25 December 2025"],
+        "runtime": "2h 32m", "budget": "₹70 crore", "box_office": "₹45 crore",
+    },
+    {
+        "title": "45 (2025 film)", "language": "Kannada", "genre": "fantasy action",
+        "directed": ["Arjun Janya"], "written": ["Arjun Janya"], "produced": ["Uma Ramesh Reddy", "M. Ramesh Reddy"],
+        "starring": ["Shiva Rajkumar", "Upendra", "Raj B. Shetty"],
+        "cinematography": "Sathya Hegde", "edited": "K. M. Prakash", "music": "Arjun Janya",
+        "company": "Suraj Productions", "release": ["25 December 2025"],
+        "runtime": "156 minutes", "budget": "₹100 crore", "box_office": "₹30 crore",
+    },
+    {
+        "title": "The Devil (2025 film)", "language": "Kannada", "genre": "action thriller",
+        "directed": ["Prakash Veer"], "written": ["Prakash Veer"], "produced": ["J. Jayamma", "Prakash Veer"],
+        "starring": ["Darshan", "Rachana Rai", "Mahesh Manjrekar"],
+        "cinematography": "Sudhakar S. Raj", "edited": "Prakash Karinja", "music": "B. Ajaneesh Loknath",
+        "company": "Sri Jaimatha Combines", "release": ["11 December 2025"],
+        "runtime": "170 minutes", "budget": "₹50 crore", "box_office": "₹60 crore",
+    },
+    {
+        "title": "Sarvam Maya", "language": "Malayalam", "genre": "supernatural comedy drama",
+        "directed": ["Akhil Sathyan"], "written": ["Akhil Sathyan"], "produced": ["Ajayya Kumar", "Rajeev Menon"],
+        "starring": ["Nivin Pauly", "Aju Varghese", "Riya Shibu", "Janardhanan"],
+        "cinematography": "Sharan Velayudhan", "edited": "Akhil Sathyan", "music": "Justin Prabhakaran",
+        "company": "Firefly Films", "release": ["25 December 2025"],
+        "runtime": "2 hours 30 minutes", "budget": "₹30 crore", "box_office": "₹130 crore",
+    },
+    {
+        "title": "Maareesan", "language": "Tamil", "genre": "road thriller",
+        "directed": ["Sudheesh Sankar"], "written": ["V. Krishnamoorthy"], "produced": ["R. B. Choudary"],
+        "starring": ["Fahadh Faasil", "Vadivelu", "Kovai Sarala"],
+        "cinematography": "Kalaiselvan Sivaji", "edited": "Sreejith Sarang", "music": "Yuvan Shankar Raja",
+        "company": "Super Good Films", "release": ["25 July 2025"],
+        "runtime": "156 minutes", "budget": "₹25 crore", "box_office": "₹15 crore",
+    },
+    {
+        "title": "Dhurandhar", "language": "Hindi", "genre": "spy action thriller",
+        "directed": ["Aditya Dhar"], "written": ["Aditya Dhar"], "produced": ["Jyoti Deshpande", "Aditya Dhar", "Lokesh Dhar"],
+        "starring": ["Ranveer Singh", "Akshaye Khanna", "Sanjay Dutt", "R. Madhavan", "Arjun Rampal", "Sara Arjun"],
+        "cinematography": "Vikash Nowlakha", "edited": "Shivkumar V. Panicker", "music": "Shashwat Sachdev",
+        "company": "Jio Studios", "release": ["5 December 2025"],
+        "runtime": "214 minutes", "budget": "₹225–280 crore", "box_office": "₹1,300 crore",
+    },
+    {
+        "title": "Rahu Ketu (2026 film)", "language": "Hindi", "genre": "fantasy comedy",
+        "directed": ["Vipul Vig"], "written": ["Vipul Vig"], "produced": ["Suraj Singh", "Umesh Kumar Bansal"],
+        "starring": ["Pulkit Samrat", "Varun Sharma", "Shalini Pandey", "Piyush Mishra"],
+        "cinematography": "Manoj Soni", "edited": "Manan Ashwin Mehta", "music": "Vikram Montrose",
+        "company": "Zee Studios", "release": ["16 January 2026"],
+        "runtime": "132 minutes", "budget": "₹30 crore", "box_office": "₹10 crore",
+    },
+    {
+        "title": "Ikkis", "language": "Hindi", "genre": "biographical war drama",
+        "directed": ["Sriram Raghavan"], "written": ["Sriram Raghavan", "Arijit Biswas", "Pooja Ladha Surti"],
+        "produced": ["Dinesh Vijan"], "starring": ["Agastya Nanda", "Dharmendra", "Jaideep Ahlawat", "Simar Bhatia"],
+        "cinematography": "Anil Mehta", "edited": "Pooja Ladha Surti", "music": "Shankar–Ehsaan–Loy",
+        "company": "Maddock Films", "release": ["1 January 2026"],
+        "runtime": "147 minutes", "budget": "₹60 crore", "box_office": "₹40 crore",
+    },
+    {
+        "title": "Border 2", "language": "Hindi", "genre": "war action",
+        "directed": ["Anurag Singh"], "written": ["Sumit Arora", "Anurag Singh"], "produced": ["Bhushan Kumar", "J. P. Dutta", "Nidhi Dutta"],
+        "starring": ["Sunny Deol", "Varun Dhawan", "Diljit Dosanjh", "Ahan Shetty"],
+        "cinematography": "Anshul Chobey", "edited": "Nitin Baid", "music": "Mithoon",
+        "company": "T-Series Films", "release": ["23 January 2026"],
+        "runtime": "2 hrs 50 mins", "budget": "₹275 crore", "box_office": "TBA",
+    },
+    {
+        "title": "Sky Force (film)", "language": "Hindi", "genre": "war action",
+        "directed": ["Sandeep Kewlani", "Abhishek Anil Kapur"], "written": ["Sandeep Kewlani", "Aamil Keeyan Khan"],
+        "produced": ["Dinesh Vijan", "Amar Kaushik", "Jyoti Deshpande"],
+        "starring": ["Akshay Kumar", "Veer Pahariya", "Sara Ali Khan", "Nimrat Kaur"],
+        "cinematography": "Santosh Thundiyil", "edited": "Chandan Arora", "music": "Tanishk Bagchi",
+        "company": "Maddock Films", "release": ["24 January 2025", "22 January 2025 (premiere)"],
+        "runtime": "125 minutes", "budget": "₹160 crore", "box_office": "₹174.21 crore",
+    },
+]
+
+WORDS = (
+    "the film follows a young officer whose family is drawn into a conflict that "
+    "spans two decades and several cities while the police investigate a series "
+    "of crimes linked to a powerful politician and his rivals in the state the "
+    "production began in early shooting took place across locations in Chennai "
+    "Hyderabad Mumbai and Kochi with the music rights acquired by a leading label "
+    "critics praised the performances cinematography and background score though "
+    "some reviewers felt the second half was overlong and the climax predictable"
+).split()
+
+
+def wiki_link(text):
+    return f'<a href="/wiki/{quote(text.replace(" ", "_"))}" title="{html.escape(text)}">{html.escape(text)}</a>'
+
+
+def sentence(rng, n_refs):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(12, 28))]
+    words[0] = words[0].capitalize()
+    text = " ".join(words) + "."
+    if rng.random() < 0.6:
+        n = rng.randint(1, n_refs)
+        text += f'<sup id="cite_ref-{n}" class="reference"><a href="#cite_note-{n}"><span class="cite-bracket">&#91;</span>{n}<span class="cite-bracket">&#93;</span></a></sup>'
+    return text
+
+
+def paragraph(rng, n_refs, sentences=5):
+    return "<p>" + " ".join(sentence(rng, n_refs) for _ in range(sentences)) + "\n</p>"
+
+
+def plainlist(items, render=wiki_link):
+    style = (
+        '<style data-mw-deduplicate="TemplateStyles:r1126788409">.mw-parser-output .plainlist ol,'
+        '.mw-parser-output .plainlist ul{line-height:inherit;list-style:none;margin:0;padding:0}'
+        '.mw-parser-output .plainlist ol li,.mw-parser-output .plainlist ul li{margin-bottom:0}</style>'
+    )
+    lis = "".join(f"<li>{render(i)}</li>" for i in items)
+    return f'{style}<div class="plainlist"><ul>{lis}</ul></div>'
+
+
+def people(names):
+    if len(names) == 1:
+        return wiki_link(names[0])
+    return plainlist(names)
+
+
+def release_cell(film):
+    items = []
+    for raw in film["release"]:
+        note = ""
+        if "(" in raw:
+            raw, note = raw.split("(", 1)
+            raw, note = raw.strip(), f" ({note}"
+        items.append(
+            f'{html.escape(raw)}<span style="display:none">&#160;(<span class="bday dtstart published updated itvstart">'
+            f"{raw}</span>)</span>{html.escape(note)}"
+        )
+    if len(items) == 1:
+        return items[0]
+    return plainlist(items, render=str)
+
+
+def infobox(film, n_refs):
+    name = film["title"].split(" (")[0]
+    image = quote(name.replace(" ", "_")) + "_poster.jpg"
+    rows = [
+        f'<tr><th colspan="2" class="infobox-above summary"><i>{html.escape(name)}</i></th></tr>',
+        '<tr><td colspan="2" class="infobox-image"><span class="mw-default-size" typeof="mw:File/Frameless">'
+        f'<a href="/wiki/File:{image}" class="image mw-file-description" title="Theatrical release poster">'
+        f'<img alt="Theatrical release poster" src="//upload.wikimedia.org/wikipedia/en/thumb/1/1a/{image}/220px-{image}" '
+        f'decoding="async" width="220" height="326" class="mw-file-element" '
+        f'srcset="//upload.wikimedia.org/wikipedia/en/1/1a/{image} 1.5x" data-file-width="250" data-file-height="370" /></a>'
+        '</span><div class="infobox-caption">Theatrical release poster</div></td></tr>',
+    ]
+
+    def row(label, cell):
+        rows.append(
+            f'<tr><th scope="row" class="infobox-label"><div style="display:inline-block; line-height:1.2em; padding:.1em 0;">'
+            f"{label}</div></th><td class=\"infobox-data\">{cell}</td></tr>"
+        )
+
+    def ref():
+        n = random.Random(len(rows)).randint(1, n_refs)
+        return f'<sup id="cite_ref-ib{len(rows)}" class="reference"><a href="#cite_note-{n}"><span class="cite-bracket">&#91;</span>{n}<span class="cite-bracket">&#93;</span></a></sup>'
+
+    row("Directed by", people(film["directed"]))
+    if "written" in film:
+        row("Written by", people(film["written"]))
+    if "screenplay" in film:
+        row("Screenplay by", people(film["screenplay"]))
+    row("Produced by", people(film["produced"]))
+    row("Starring", plainlist(film["starring"]))
+    row("Cinematography", html.escape(film["cinematography"]))
+    row("Edited by", html.escape(film["edited"]))
+    row("Music by", wiki_link(film["music"]))
+    row("<span class=\"nowrap\">Production</span><br />company", wiki_link(film["company"]))
+    row("Distributed by", wiki_link(film["company"]))
+    row("Release date" + ("s" if len(film["release"]) > 1 else ""), release_cell(film))
+    row("Running time", html.escape(film["runtime"]) + ref())
+    row("Country", "India")
+    row("Language", film["language"])
+    row("Budget", html.escape(film["budget"]) + ref())
+    row("Box office", html.escape(film["box_office"]) + ref())
+
+    return (
+        '<table class="infobox vevent"><tbody>' + "".join(rows) + "</tbody></table>"
+    )
+
+
+def navbox(rng, title):
+    groups = []
+    for g in range(8):
+        links = " ".join(
+            f'<li>{wiki_link(" ".join(rng.choice(WORDS).capitalize() for _ in range(2)))}</li>'
+            for _ in range(rng.randint(8, 20))
+        )
+        groups.append(
+            f'<tr><th scope="row" class="navbox-group">Group {g}</th>'
+            f'<td class="navbox-list-with-group navbox-list navbox-odd"><div><ul>{links}</ul></div></td></tr>'
+        )
+    return (
+        '<div role="navigation" class="navbox" aria-label="Navbox"><table class="nowraplinks mw-collapsible '
+        f'autocollapse navbox-inner"><tbody><tr><th scope="col" class="navbox-title" colspan="2">{title}</th></tr>'
+        + "".join(groups) + "</tbody></table></div>"
+    )
+
+
+def references(rng, n_refs):
+    items = []
+    for n in range(1, n_refs + 1):
+        items.append(
+            f'<li id="cite_note-{n}"><span class="mw-cite-backlink"><b><a href="#cite_ref-{n}">^</a></b></span> '
+            f'<span class="reference-text"><link rel="mw-deduplicated-inline-style" href="mw-data:TemplateStyles:r1238218222">'
+            f'<cite class="citation news cs1">"{" ".join(rng.choice(WORDS) for _ in range(8)).title()}". '
+            f'<i>{rng.choice(["The Hindu", "The Times of India", "Deccan Chronicle", "Hindustan Times", "Cinema Express"])}</i>. '
+            f'{rng.randint(1, 28)} {rng.choice(["January", "March", "June", "October", "December"])} 2025. '
+            f'<a rel="nofollow" class="external text" href="https://example.org/news/{n}">Archived</a> from the original.</cite></span></li>'
+        )
+    return '<div class="reflist"><div class="mw-references-wrap mw-references-columns"><ol class="references">' + "".join(items) + "</ol></div></div>"
+
+
+def chrome_head(film, meta):
+    rlconf = {
+        "wgBreakFrames": False, "wgSeparatorTransformTable": ["", ""], "wgDigitTransformTable": ["", ""],
+        "wgDefaultDateFormat": "dmy", "wgMonthNames": ["", "January", "February", "March", "April", "May", "June",
+        "July", "August", "September", "October", "November", "December"], "wgRequestId": "f1a2b3c4d5",
+        "wgCanonicalNamespace": "", "wgCanonicalSpecialPageName": False, "wgNamespaceNumber": 0,
+        "wgPageName": film["title"].replace(" ", "_"), "wgTitle": film["title"], "wgCurRevisionId": meta["revid"],
+        "wgRevisionId": meta["revid"], "wgArticleId": meta["pageid"], "wgIsArticle": True, "wgIsRedirect": False,
+        "wgAction": "view", "wgUserName": None, "wgUserGroups": ["*"],
+        "wgCategories": [f"{film['language']}-language films", "Indian films", "2020s films"],
+        "wgPageContentLanguage": "en", "wgPageContentModel": "wikitext", "wgRelevantPageName": film["title"].replace(" ", "_"),
+        "wgRelevantArticleId": meta["pageid"], "wgIsProbablyEditable": True, "wgRestrictionEdit": [],
+        "wgWikibaseItemId": f"Q{meta['pageid'] % 10 ** 8}",
+    }
+    modules = ",".join(f"ext.module{i}" for i in range(60))
+    return (
+        '<!DOCTYPE html>\n<html class="client-nojs vector-feature-language-in-header-enabled" lang="en" dir="ltr">\n<head>\n'
+        f'<meta charset="UTF-8">\n<title>{html.escape(film["title"])} - Wikipedia</title>\n'
+        f'<script>(function(){{var className="client-js";}}());RLCONF={json.dumps(rlconf)};\n'
+        f'RLSTATE={{"ext.globalCssJs.user.styles":"ready","site.styles":"ready"}};RLPAGEMODULES=["{modules}"];</script>\n'
+        '<script>(RLQ=window.RLQ||[]).push(function(){mw.loader.impl(function(){return["user.options@12s5i",function($,jQuery,require,module){mw.user.tokens.set({"patrolToken":"+\\\\"});}];});});</script>\n'
+        '<link rel="stylesheet" href="/w/load.php?lang=en&amp;modules=ext.cite.styles%7Cext.uls.interlanguage%7Cskins.vector.styles&amp;only=styles&amp;skin=vector-2022">\n'
+        + "<style>" + ".mw-parser-output .x{display:none}" * 200 + "</style>\n"
+        '<meta name="generator" content="MediaWiki 1.45.0-wmf.1">\n</head>\n'
+    )
+
+
+def sidebar(rng):
+    links = "".join(
+        f'<li id="n-{i}" class="mw-list-item"><a href="/wiki/Special:Page{i}"><span>{" ".join(rng.choice(WORDS) for _ in range(2)).title()}</span></a></li>'
+        for i in range(40)
+    )
+    langs = "".join(
+        f'<li class="interlanguage-link"><a href="https://{code}.wikipedia.org/wiki/X" hreflang="{code}" class="interlanguage-link-target"><span>{code}</span></a></li>'
+        for code in ("hi", "ta", "te", "kn", "ml", "bn", "mr", "gu", "pa", "ur", "fr", "de", "es", "ru", "ja")
+    )
+    return f'<div class="vector-header-container"><nav><ul>{links}</ul></nav><ul class="vector-menu-content-list">{langs}</ul></div>'
+
+
+def article(film, meta):
+    rng = random.Random(meta["pageid"])
+    n_refs = rng.randint(150, 260)
+    name = film["title"].split(" (")[0]
+    starring = ", ".join(wiki_link(s) for s in film["starring"][:3])
+
+    lead = (
+        f"<p><i><b>{html.escape(name)}</b></i> is a {film['release'][0][-4:]} Indian "
+        f"{wiki_link(film['language'] + ' language').replace('>' + html.escape(film['language'] + ' language') + '<', '>' + film['language'] + '<')}"
+        f"-language {film['genre']} film directed by {wiki_link(film['directed'][0])}. It stars {starring}."
+        + sentence(rng, n_refs) + " " + sentence(rng, n_refs) + "\n</p>"
+    )
+
+    sections = []
+    for heading in ("Plot", "Cast", "Production", "Music", "Release", "Reception", "Box office"):
+        anchor = heading.replace(" ", "_")
+        body = "".join(paragraph(rng, n_refs, rng.randint(5, 10)) for _ in range(rng.randint(4, 9)))
+        if heading == "Cast":
+            body = "<ul>" + "".join(f"<li>{wiki_link(s)} as {rng.choice(WORDS).capitalize()}</li>" for s in film["starring"] * 3) + "</ul>"
+        sections.append(
+            f'<div class="mw-heading mw-heading2"><h2 id="{anchor}">{heading}</h2>'
+            f'<span class="mw-editsection"><span class="mw-editsection-bracket">[</span><a href="/w/index.php?title=X&amp;action=edit&amp;section=1">edit</a>'
+            f'<span class="mw-editsection-bracket">]</span></span></div>{body}'
+        )
+
+    content = (
+        '<div id="mw-content-text" class="mw-body-content"><div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">'
+        f'<div class="shortdescription nomobile noexcerpt noprint searchaux" style="display:none">{html.escape(meta["description"])}</div>'
+        '<p class="mw-empty-elt">\n</p>'
+        + infobox(film, n_refs) + lead
+        + paragraph(rng, n_refs, 3)
+        + '<meta property="mw:PageProp/toc" />'
+        + "".join(sections)
+        + '<div class="mw-heading mw-heading2"><h2 id="References">References</h2></div>'
+        + references(rng, n_refs)
+        + navbox(rng, f"Films directed by {film['directed'][0]}")
+        + navbox(rng, f"{film['language']} cinema")
+        + "</div></div>"
+    )
+
+    return (
+        chrome_head(film, meta)
+        + '<body class="skin-vector-2022 mediawiki ltr sitedir-ltr ns-0 ns-subject page-rootpage">'
+        + sidebar(rng)
+        + '<div class="mw-page-container"><main id="content" class="mw-body">'
+        f'<header class="mw-body-header"><h1 id="firstHeading" class="firstHeading mw-first-heading">'
+        f'<span class="mw-page-title-main">{html.escape(film["title"])}</span></h1></header>'
+        + content
+        + '<div id="catlinks" class="catlinks"><ul>' + "".join(f"<li><a>{c}</a></li>" for c in ("Indian films", "2020s films")) + "</ul></div>"
+        + "</main></div><footer><ul>" + "".join(f"<li>Footer link {i}</li>" for i in range(30)) + "</ul></footer>"
+        + "<script>(RLQ=window.RLQ||[]).push(function(){mw.config.set({\"wgBackendResponseTime\":150});});</script>"
+        + "</body></html>"
+    )
+
+
+def file_name(title):
+    return quote(title.replace(" ", "_"), safe="") + ".html.gz"
+
+
+def main():
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    index = {}
+
+    for n, film in enumerate(FILMS):
+        meta = {
+            "pageid": 77000000 + n * 1013,
+            "revid": 1320000000 + n * 7919,
+            "language": film["language"],
+            "description": f"{film['release'][0][-4:]} Indian {film['language']}-language {film['genre']} film",
+            "file": file_name(film["title"]),
+        }
+        page = article(film, meta)
+        # mtime=0 keeps the fixtures byte-stable across regenerations
+        with open(OUT_DIR / meta["file"], "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as fh:
+                fh.write(page.encode("utf-8"))
+        index[film["title"]] = meta
+
+    (OUT_DIR / "index.json").write_text(json.dumps(index, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
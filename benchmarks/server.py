@@ -0,0 +1,226 @@
+# Local stand-in for the services the spiders talk to, serving the recorded
+# fixtures:
+#
+#   api3.pvrcinemas.com   POST now-showing (per city, from the "city" header)
+#   api2.ottplay.com      new-release pages
+#   duckduckgo.com        HTML result pages (picked by a hash of the query)
+#   www.youtube.com       /results search pages carrying a video id derived
+#                         from the query
+#   *.wikipedia.org       /wiki/<title> articles and a fake /w/api.php that
+#                         answers titles=/prop=info queries, list=search and
+#                         action=parse&section=0 from the article corpus
+#
+# Requests reach it through StandInMiddleware, which rewrites
+# https://<host>/<path> to http://127.0.0.1:<port>/<host>/<path> and puts the
+# original URL back on the response, so callbacks see the real URLs.
+
+import gzip
+import json
+import threading
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from scrapy.exceptions import NotConfigured
+
+from benchmarks.common import FIXTURES
+
+LEAD_START = '<div class="mw-content-ltr mw-parser-output"'
+LEAD_END = '<div class="mw-heading mw-heading2">'
+
+
+def load_json(path):
+    return json.loads((FIXTURES / path).read_text(encoding="utf-8"))
+
+
+class Fixtures:
+    def __init__(self):
+        self.pvr = load_json("pvr/nowshowing.json")
+        self.ottplay = {
+            int(p.stem.split("-")[1]): p.read_bytes() for p in (FIXTURES / "ottplay").glob("page-*.json")
+        }
+        self.ddg = [p.read_bytes() for p in sorted((FIXTURES / "ddg").glob("results-*.html"))]
+        self.wiki = load_json("wiki/index.json")
+        self.by_lower = {title.lower(): title for title in self.wiki}
+
+    @lru_cache(maxsize=None)
+    def article(self, title):
+        with gzip.open(FIXTURES / "wiki" / self.wiki[title]["file"], "rt", encoding="utf-8") as fh:
+            return fh.read()
+
+    def lead(self, title):
+        text = self.article(title)
+        start = text.index(LEAD_START)
+        return text[start:text.index(LEAD_END, start)] + "</div>"
+
+    def normalize(self, title):
+        title = unquote(title).replace("_", " ").strip()
+        return title[:1].upper() + title[1:]
+
+    def page(self, title):
+        meta = self.wiki[title]
+        return {
+            "pageid": meta["pageid"], "ns": 0, "title": title,
+            "contentmodel": "wikitext", "pagelanguage": "en",
+            "lastrevid": meta["revid"], "length": len(self.article(title)),
+            "description": meta["description"], "descriptionsource": "local",
+        }
+
+    def query_titles(self, titles):
+        normalized, pages = [], []
+        for raw in titles:
+            title = self.normalize(raw)
+            if title != raw:
+                normalized.append({"fromencoded": False, "from": raw, "to": title})
+            if title in self.wiki:
+                pages.append(self.page(title))
+            else:
+                pages.append({"ns": 0, "title": title, "missing": True})
+
+        query = {"pages": pages}
+        if normalized:
+            query["normalized"] = normalized
+        return {"batchcomplete": True, "query": query}
+
+    def search(self, text):
+        terms = [t for t in text.lower().split() if t not in ("film", "tamil", "telugu", "hindi", "kannada", "malayalam")]
+        results = []
+        for lower, title in self.by_lower.items():
+            if terms and all(t in lower for t in terms):
+                results.append({"ns": 0, "title": title, "pageid": self.wiki[title]["pageid"], "size": 40000, "wordcount": 3000})
+        return {"batchcomplete": "", "query": {"searchinfo": {"totalhits": len(results)}, "search": results[:1]}}
+
+    def parse(self, title):
+        title = self.normalize(title)
+        if title not in self.wiki:
+            return {"error": {"code": "missingtitle", "info": "The page you specified doesn't exist."}}
+
+        meta = self.wiki[title]
+        return {"parse": {"title": title, "pageid": meta["pageid"], "revid": meta["revid"], "text": self.lead(title)}}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fixtures = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type="application/json; charset=utf-8", status=200):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self):
+        host, _, rest = self.path.lstrip("/").partition("/")
+        parts = urlsplit("/" + rest)
+        return host, parts.path, {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        host, path, _ = self.route()
+        if host == "api3.pvrcinemas.com":
+            city = self.headers.get("city") or json.loads(body or b"{}").get("city")
+            data = self.fixtures.pvr.get(city) or next(iter(self.fixtures.pvr.values()))
+            return self.send_body(data)
+
+        self.send_body({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        host, path, params = self.route()
+        fixtures = self.fixtures
+
+        if host == "api2.ottplay.com":
+            page = fixtures.ottplay.get(int(params.get("page", 1)))
+            return self.send_body(page or {"success": True, "result": []})
+
+        if host == "duckduckgo.com":
+            page = fixtures.ddg[zlib.crc32(params.get("q", "").encode("utf-8")) % len(fixtures.ddg)]
+            return self.send_body(page, "text/html; charset=utf-8")
+
+        if host == "www.youtube.com" and path == "/results":
+            video_id = "%011x" % (zlib.crc32(params.get("search_query", "").encode("utf-8")) * 3 % 16 ** 11)
+            initial = {"contents": {"sectionListRenderer": {"contents": [{"itemSectionRenderer": {"contents": [
+                {"videoRenderer": {"videoId": video_id, "title": {"runs": [{"text": params.get("search_query", "")}]}}}
+            ]}}]}}}
+            page = ("<!DOCTYPE html><html><head><title>YouTube</title></head><body><script>var ytInitialData = "
+                    + json.dumps(initial, separators=(",", ":")) + ";</script></body></html>")
+            return self.send_body(page, "text/html; charset=utf-8")
+
+        if host.endswith("wikipedia.org") and path.startswith("/wiki/"):
+            title = fixtures.normalize(path[len("/wiki/"):])
+            if title not in fixtures.wiki:
+                return self.send_body("<html><body>Wikipedia does not have an article with this exact name.</body></html>",
+                                      "text/html; charset=utf-8", status=404)
+            return self.send_body(fixtures.article(title), "text/html; charset=UTF-8")
+
+        if host.endswith("wikipedia.org") and path == "/w/api.php":
+            if params.get("action") == "parse":
+                return self.send_body(fixtures.parse(params.get("page", "")))
+            if params.get("list") == "search":
+                return self.send_body(fixtures.search(params.get("srsearch", "")))
+            if "titles" in params:
+                return self.send_body(fixtures.query_titles(params["titles"].split("|")))
+
+        self.send_body({"error": "not found"}, status=404)
+
+
+class StandInServer:
+    def __init__(self, port=0):
+        handler = type("Handler", (StandInHandler,), {"fixtures": Fixtures()})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StandInMiddleware:
+    # Downloader middleware (install it first, e.g. at 1): sends every
+    # request to the stand-in server at BENCH_SERVER_URL instead
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        base_url = crawler.settings.get("BENCH_SERVER_URL")
+        if not base_url:
+            raise NotConfigured
+        return cls(base_url)
+
+    def process_request(self, request, spider):
+        if "bench_original_url" in request.meta:
+            return None
+
+        parts = urlsplit(request.url)
+        local = f"{self.base_url}/{parts.hostname}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        # dont_filter: the local URL must not trip the dupe or offsite filters
+        return request.replace(url=local, dont_filter=True, meta={**request.meta, "bench_original_url": request.url})
+
+    def process_response(self, request, response, spider):
+        original = request.meta.get("bench_original_url")
+        if original is None:
+            return response
+        return response.replace(url=original)